@@ -0,0 +1,65 @@
+import secrets
+
+from fastapi import Depends, APIRouter, HTTPException, Header, status
+from fastapi.responses import FileResponse
+
+from app.api.endpoints.users import get_current_active_user
+from app.api.models.models import User
+from app.api.services.cache_service import cache
+from app.api.services.profiling_service import profile_store
+from app.api.utils.pool_metrics import get_pool_stats
+from app.config import engine, settings
+from app.database import replica_router
+
+
+router = APIRouter(prefix="/internal")
+
+
+@router.get("/cache/stats", tags=["internal"])
+async def read_cache_stats(current_user: User = Depends(get_current_active_user)):
+    return cache.stats()
+
+
+@router.get("/db/pool", tags=["internal"])
+async def read_pool_stats(current_user: User = Depends(get_current_active_user)):
+    return get_pool_stats(engine.sync_engine)
+
+
+@router.get("/db/replicas", tags=["internal"])
+async def read_replica_stats(current_user: User = Depends(get_current_active_user)):
+    return [
+        {**replica, "pool": get_pool_stats(replica_engine.sync_engine)}
+        for replica, replica_engine in zip(replica_router.stats(), replica_router.engines)
+    ]
+
+
+def require_profiling_token(x_profile: str | None = Header(default=None)):
+    """
+    Profiles expose the code paths of other users' requests, so reading them takes the profiling token
+    in the X-Profile header like triggering them does. They do not exist while profiling is disabled.
+    """
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_profile is None or not secrets.compare_digest(x_profile.encode(), settings.PROFILING_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling token")
+
+
+@router.get("/profiles", tags=["internal"], dependencies=[Depends(require_profiling_token)])
+async def read_profiles(current_user: User = Depends(get_current_active_user)):
+    return profile_store.list()
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=FileResponse,
+    tags=["internal"],
+    dependencies=[Depends(require_profiling_token)],
+)
+async def read_profile(profile_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Returns a request profile as collapsed stacks, which speedscope opens as is.
+    """
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, backref
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, BackgroundTasks, Query, Response
+from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey, or_, delete
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, backref
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.endpoints.users import get_current_active_user
+from app.api.services.standings_service import apply_match_result, rebuild_tournament_standings
+from app.api.services.cache_service import cache, tournament_tag, football_team_tag
+from app.api.services.purge_service import purge_tournament
+from app.api.services.version_service import bump_tournament_versions, bump_football_team_versions
 from app.api.models.models import User, Player, FootballTeam, TournamentType, Tournament, Match, \
     FootballTeamToTournament
 
@@ -15,102 +20,141 @@ from app.database import get_db
 router = APIRouter()
 
 
+# Rows that depend on a removed row are deleted by the ON DELETE CASCADE foreign keys,
+# so every removal is a single DELETE statement without loading the dependent rows.
+
+
 @router.delete("/football_team/{team_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["football teams endpoints"])
-def remove_football_team(team_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def remove_football_team(team_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     """
     Removes a football team.
     """
-    football_team = db.execute(
-        select(FootballTeam).where(FootballTeam.id == team_id)
-    ).scalars().first()
+    # The team's matches are locked before its tournaments, in the order the standings writers lock them
+    tournament_ids = sorted(set((await db.execute(
+        select(Match.tournament_id)
+        .where(or_(Match.home_team_id == team_id, Match.guest_team_id == team_id))
+        .with_for_update()
+    )).scalars()))
+    await bump_football_team_versions(db, [team_id])
+
+    football_team = (await db.execute(
+        delete(FootballTeam).where(FootballTeam.id == team_id).returning(FootballTeam.id)
+    )).first()
 
     if football_team is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such football team is not exist")
 
-    db.delete(football_team)
-    db.commit()
+    # The team's matches are gone, so its opponents' standings must be recomputed
+    for tournament_id in tournament_ids:
+        await rebuild_tournament_standings(db, tournament_id)
+
+    await db.commit()
+    cache.invalidate_tags(football_team_tag(team_id), *map(tournament_tag, tournament_ids))
     return
 
 
 @router.delete("/tournament/{tournament_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["tournaments endpoints"])
-def remove_tournament(
+async def remove_tournament(
     tournament_id: int,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    background: bool = Query(False, description="Purge the matches in small batches after responding with 202"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Removes a tournament.
     """
-    tournament = db.execute(
-        select(Tournament).where(Tournament.id == tournament_id)
-    ).scalars().first()
+    if background:
+        tournament = (await db.execute(select(Tournament.id).where(Tournament.id == tournament_id))).first()
+        if tournament is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such tournament does not exist")
+
+        background_tasks.add_task(purge_tournament, tournament_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
+    tournament = (await db.execute(
+        delete(Tournament).where(Tournament.id == tournament_id).returning(Tournament.id)
+    )).first()
 
     if tournament is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such tournament does not exist")
 
-    db.delete(tournament)
-    db.commit()
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(tournament_id))
     return
 
 
 @router.delete("/tournament_type/{tournament_type_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["tournament types endpoints"])
-def remove_tournament_type(
+async def remove_tournament_type(
     tournament_type_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Removes a tournament type.
     """
-    tournament_type = db.execute(
-        select(TournamentType).where(TournamentType.id == tournament_type_id)
-    ).scalars().first()
+    tournament_ids = (await db.execute(
+        select(Tournament.id).where(Tournament.tournament_type_id == tournament_type_id)
+    )).scalars().all()
+
+    tournament_type = (await db.execute(
+        delete(TournamentType).where(TournamentType.id == tournament_type_id).returning(TournamentType.id)
+    )).first()
 
     if tournament_type is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such tournament type does not exist")
 
-    db.delete(tournament_type)
-    db.commit()
+    await db.commit()
+    cache.invalidate_tags(*map(tournament_tag, tournament_ids))
     return
 
 
 @router.delete("/match/{match_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["matches endpoints"])
-def remove_match(
+async def remove_match(
     match_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Removes a match.
     """
-    match = db.execute(
-        select(Match).where(Match.id == match_id)
-    ).scalars().first()
+    match = (await db.execute(
+        delete(Match).where(Match.id == match_id).returning(
+            Match.tournament_id, Match.home_team_id, Match.guest_team_id, Match.home_team_score, Match.guest_team_score
+        )
+    )).first()
 
     if match is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such match does not exist")
 
-    db.delete(match)
-    db.commit()
+    await apply_match_result(db, match.tournament_id, match.home_team_id, match.guest_team_id,
+                             match.home_team_score, match.guest_team_score, sign=-1)
+    await bump_tournament_versions(db, [match.tournament_id])
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(match.tournament_id))
     return
 
 
 @router.delete("/football_team_to_tournament/{mapping_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["football team to tournament endpoints"])
-def remove_football_team_to_tournament(
+async def remove_football_team_to_tournament(
     mapping_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Removes a football team to tournament mapping.
     """
-    mapping = db.execute(
-        select(FootballTeamToTournament).where(FootballTeamToTournament.id == mapping_id)
-    ).scalars().first()
+    mapping = (await db.execute(
+        delete(FootballTeamToTournament)
+        .where(FootballTeamToTournament.id == mapping_id)
+        .returning(FootballTeamToTournament.tournament_id)
+    )).first()
 
     if mapping is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such football team to tournament mapping does not exist")
 
-    db.delete(mapping)
-    db.commit()
+    await rebuild_tournament_standings(db, mapping.tournament_id)
+    await bump_tournament_versions(db, [mapping.tournament_id])
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(mapping.tournament_id))
     return
@@ -0,0 +1,110 @@
+from typing import Literal
+
+from fastapi import Depends, APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.endpoints.users import get_current_active_user
+from app.api.services.standings_service import select_standings
+from app.api.utils.export_functions import EXPORT_ENCODERS, EXPORT_MEDIA_TYPES
+from app.api.models.models import User, FootballTeam, TournamentType, Tournament, Match, TournamentStanding
+
+from app.database import get_read_db
+
+
+router = APIRouter(prefix="/export", tags=["export endpoints"])
+
+
+# Rows fetched from the server-side cursor at a time, also the size of a response chunk
+EXPORT_BATCH_SIZE = 1000
+
+ExportFormat = Literal["ndjson", "csv"]
+
+
+async def stream_export(db: AsyncSession, statement, export_format: ExportFormat, name: str) -> StreamingResponse:
+    """
+    Runs the statement on a server-side cursor and streams the encoded rows, so neither the
+    result nor the response body is ever held in memory as a whole.
+    """
+    result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    return StreamingResponse(
+        EXPORT_ENCODERS[export_format](result),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'},
+    )
+
+
+@router.get("/tournaments")
+async def export_tournaments(
+    format: ExportFormat = Query("ndjson"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Exports all tournaments.
+    """
+    statement = (
+        select(
+            Tournament.id,
+            Tournament.player_id,
+            Tournament.tournament_name,
+            TournamentType.tournament_type_name.label("tournament_type"),
+            Tournament.season,
+            Tournament.region,
+        )
+        .join(TournamentType, TournamentType.id == Tournament.tournament_type_id)
+        .order_by(Tournament.id)
+    )
+    return await stream_export(db, statement, format, "tournaments")
+
+
+@router.get("/matches")
+async def export_matches(
+    tournament_id: int | None = Query(None, description="Only the matches of this tournament"),
+    format: ExportFormat = Query("ndjson"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Exports the schedule and results of one or all tournaments.
+    """
+    home_team = aliased(FootballTeam)
+    guest_team = aliased(FootballTeam)
+    statement = (
+        select(
+            Match.id,
+            Match.tournament_id,
+            Match.tour_number,
+            Match.date,
+            Match.home_team_id,
+            home_team.team_name.label("home_team_name"),
+            Match.guest_team_id,
+            guest_team.team_name.label("guest_team_name"),
+            Match.home_team_score,
+            Match.guest_team_score,
+        )
+        .join(home_team, home_team.id == Match.home_team_id)
+        .join(guest_team, guest_team.id == Match.guest_team_id)
+        .order_by(Match.tournament_id, Match.tour_number, Match.id)
+    )
+    if tournament_id is not None:
+        statement = statement.where(Match.tournament_id == tournament_id)
+    return await stream_export(db, statement, format, "matches")
+
+
+@router.get("/standings")
+async def export_standings(
+    tournament_id: int | None = Query(None, description="Only the standings of this tournament"),
+    format: ExportFormat = Query("ndjson"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Exports the standings of one or all tournaments.
+    """
+    statement = select_standings()
+    if tournament_id is not None:
+        statement = statement.where(TournamentStanding.tournament_id == tournament_id)
+    return await stream_export(db, statement, format, "standings")
@@ -1,108 +1,180 @@
 from datetime import datetime, timedelta
 from typing import Annotated, List
 
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey, text
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, backref
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey, join
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, backref, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.endpoints.users import get_current_active_user
-from app.api.repositories.tournament_queries import TOURNAMENT_STANDINGS_SQL
+from app.api.services.standings_service import get_tournament_standings
+from app.api.services.cache_service import cache, tournament_tag, football_team_tag
+from app.api.utils.pagination import ListingPage, read_listing_page
+from app.api.utils.etags import etag_matches
+from app.api.utils.responses import ModelResponse
+from app.api.services.logo_service import logo_store, find_logo
+from app.api.services.version_service import get_tournament_version, tournament_etag, football_team_etag
 from app.api.models.models import User, Player, FootballTeam, TournamentType, Tournament, Match, \
     FootballTeamToTournament
 from app.api.schemas.item import FootballTeamCreate, TournamentTypeCreate, TournamentCreate, \
     FootballTeamToTournamentCreate, MatchCreate, FootballTeamInfo, TournamentTypeInfo, TournamentInfo, \
     FootballTeamToTournamentInfo, MatchInfo, FootballTeamTournamentStatistics, MatchFullInfo, TournamentFullInfo
 
-from app.database import get_db
+from app.database import get_read_db
 
 router = APIRouter()
 
 
-def parse_full_matches_info(db_matches, db):
-    matches = []
-    for match in db_matches:
-        home_team_info = db.execute(
-            select(FootballTeam)
-            .where(FootballTeam.id == match.home_team_id)
-        ).scalars().first()
-        guest_team_info = db.execute(
-            select(FootballTeam)
-            .where(FootballTeam.id == match.guest_team_id)
-        ).scalars().first()
-        matches.append(
-            MatchFullInfo(
-                id=match.id,
-                tournament_id=match.tournament_id,
-                tour_number=match.tour_number,
-                date=match.date,
-                home_team_info=FootballTeamInfo(
-                    id=home_team_info.id,
-                    player_id=home_team_info.player_id,
-                    team_name=home_team_info.team_name,
-                    team_code=home_team_info.team_code,
-                    team_logo=home_team_info.team_logo,
-                    country=home_team_info.country,
-                    city=home_team_info.city,
-                    achievements=home_team_info.achievements
-                ),
-                guest_team_info=FootballTeamInfo(
-                    id=guest_team_info.id,
-                    player_id=guest_team_info.player_id,
-                    team_name=guest_team_info.team_name,
-                    team_code=guest_team_info.team_code,
-                    team_logo=guest_team_info.team_logo,
-                    country=guest_team_info.country,
-                    city=guest_team_info.city,
-                    achievements=guest_team_info.achievements
-                ),
-                home_team_score=match.home_team_score,
-                guest_team_score=match.guest_team_score
-            )
+def parse_football_team_info(football_team):
+    return FootballTeamInfo.model_validate(football_team)
+
+
+async def parse_full_matches_info(db_matches, db):
+    team_ids = {match.home_team_id for match in db_matches} | {match.guest_team_id for match in db_matches}
+    teams_info = {}
+    if team_ids:
+        db_football_teams = await db.execute(
+            select(*FootballTeam.__table__.columns)
+            .where(FootballTeam.id.in_(team_ids))
+        )
+        teams_info = {
+            football_team.id: parse_football_team_info(football_team)
+            for football_team in db_football_teams
+        }
+
+    return [
+        MatchFullInfo(
+            id=match.id,
+            tournament_id=match.tournament_id,
+            tour_number=match.tour_number,
+            date=match.date,
+            home_team_info=teams_info[match.home_team_id],
+            guest_team_info=teams_info[match.guest_team_id],
+            home_team_score=match.home_team_score,
+            guest_team_score=match.guest_team_score
         )
+        for match in db_matches
+    ]
 
-    return matches
 
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    Returns a 304 response when the client already has the representation tagged with etag.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+async def tournament_versioned_response(request: Request, db, tournament_id, key, compute, tags, response_type):
+    """
+    Answers a read of a tournament's data with its version as the ETag. The version is cached with
+    the data under key, so a cache hit is answered, or found not modified, without a query.
+    On a miss compute() runs between two version lookups and again while a write slips in between,
+    so the cached version always describes the cached data. tags may be a callable of the data.
+    """
+    async def compute_versioned():
+        version = await get_tournament_version(db, tournament_id)
+        while True:
+            data = await compute()
+            current_version = await get_tournament_version(db, tournament_id)
+            if current_version == version:
+                return version, data
+            version = current_version
+
+    version, data = await cache.get_or_compute(
+        key, compute_versioned, (lambda entry: tags(entry[1])) if callable(tags) else tags
+    )
+    if version is None:
+        return ModelResponse(data, response_type)
 
-@router.get("/tournament/schedule/all/{tournament_id}", response_model=List[MatchFullInfo], tags=["tournament statistics"])
-def get_tournament_schedule(tournament_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    db_matches = db.execute(
-        select(Match)
-        .where(Match.tournament_id == tournament_id)
-    ).scalars().all()
+    etag = tournament_etag(tournament_id, version)
+    return not_modified(request, etag) or ModelResponse(data, response_type, headers={"ETag": etag})
 
-    return parse_full_matches_info(db_matches, db)
 
+def schedule_response(request: Request, db, tournament_id, tour_number=None):
+    async def compute():
+        query = select(*Match.__table__.columns).where(Match.tournament_id == tournament_id)
+        if tour_number is not None:
+            query = query.where(Match.tour_number == tour_number)
+        db_matches = (await db.execute(query.order_by(Match.tour_number, Match.id))).all()
+        return await parse_full_matches_info(db_matches, db)
 
-@router.get("/tournament/schedule/tour/{tournament_id}/{tour_number}", response_model=List[MatchFullInfo], tags=["tournament statistics"])
-def get_tournament_schedule(tournament_id: int, tour_number: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    db_matches = db.execute(
-        select(Match)
-        .where(Match.tournament_id == tournament_id, Match.tour_number == tour_number)
-    ).scalars().all()
+    def tags(matches):
+        team_ids = {match.home_team_info.id for match in matches} | {match.guest_team_info.id for match in matches}
+        return [tournament_tag(tournament_id), *map(football_team_tag, team_ids)]
+
+    return tournament_versioned_response(
+        request, db, tournament_id, ("schedule", tournament_id, tour_number), compute, tags, List[MatchFullInfo]
+    )
 
-    return parse_full_matches_info(db_matches, db)
+
+@router.get("/tournament/schedule/all/{tournament_id}", response_model=List[MatchFullInfo], tags=["tournament statistics"])
+async def get_tournament_schedule(tournament_id: int, request: Request, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return await schedule_response(request, db, tournament_id)
+
+
+@router.get("/tournament/schedule/tour/{tournament_id}/{tour_number}", response_model=List[MatchFullInfo], tags=["tournament statistics"])
+async def get_tournament_tour_schedule(tournament_id: int, tour_number: int, request: Request, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return await schedule_response(request, db, tournament_id, tour_number)
 
 
 @router.get("/tournament/statistics/{tournament_id}", response_model=List[FootballTeamTournamentStatistics], tags=["tournament statistics"])
-def get_tournament_statistics(tournament_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    teams_results = db.execute(text(TOURNAMENT_STANDINGS_SQL(tournament_id))).fetchall()
-    return teams_results
+async def get_tournament_statistics(tournament_id: int, request: Request, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    tags = [tournament_tag(tournament_id)]
+
+    async def compute():
+        teams_results = await get_tournament_standings(db, tournament_id)
+        tags.extend(football_team_tag(team_results.football_team_id) for team_results in teams_results)
+        return [FootballTeamTournamentStatistics.model_validate(team_results) for team_results in teams_results]
+
+    return await tournament_versioned_response(
+        request, db, tournament_id, ("standings", tournament_id), compute, tags, List[FootballTeamTournamentStatistics]
+    )
+
+
+FOOTBALL_TEAM_LISTING_COLUMNS = {name: getattr(FootballTeam, name) for name in FootballTeamInfo.model_fields}
 
 
 @router.get("/football_teams/all", response_model=List[FootballTeamInfo], tags=["football teams endpoints"])
-def read_all_football_teams(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    football_teams = db.execute(select(FootballTeam)).scalars().all()
-    return football_teams
+async def read_all_football_teams(page: ListingPage = Depends(), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return await read_listing_page(db, FOOTBALL_TEAM_LISTING_COLUMNS, FootballTeam, page)
 
 
 @router.get("/football_teams/{football_team_id}", response_model=FootballTeamInfo, tags=["football teams endpoints"])
-def read_football_team(football_team_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    football_team = db.execute(select(FootballTeam).where(FootballTeam.id == football_team_id)).scalars().first()
+async def read_football_team(football_team_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    football_team = (await db.execute(select(FootballTeam).where(FootballTeam.id == football_team_id))).scalars().first()
 
     if football_team is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such football team not found")
 
-    return football_team
+    etag = football_team_etag(football_team.id, football_team.version)
+    response.headers["ETag"] = etag
+    return not_modified(request, etag) or football_team
+
+
+@router.get("/logos/{logo_hash}", response_class=FileResponse, tags=["football teams endpoints"])
+async def read_logo(logo_hash: str, request: Request):
+    """
+    Serves a team logo. Logos are addressed by the hash of their content and never change,
+    so they need no authentication and may be cached for good.
+    """
+    media_type = await find_logo(logo_hash)
+    if media_type is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such logo not found")
+
+    headers = {
+        "ETag": f'"{logo_hash}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # Logos are served from the API's origin, nothing in them may be sniffed into a document or run
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; sandbox",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(logo_store.path(logo_hash), media_type=media_type, headers=headers)
 
 
 def parse_tournament_full_info(tournament):
@@ -116,35 +188,53 @@ def parse_tournament_full_info(tournament):
     )
 
 
+TOURNAMENT_LISTING_COLUMNS = {
+    "id": Tournament.id,
+    "player_id": Tournament.player_id,
+    "tournament_name": Tournament.tournament_name,
+    "tournament_type": TournamentType.tournament_type_name.label("tournament_type"),
+    "season": Tournament.season,
+    "region": Tournament.region,
+}
+
+
 @router.get("/tournaments/all", response_model=List[TournamentFullInfo], tags=["tournaments endpoints"])
-def read_all_tournaments(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    tournaments = db.execute(select(Tournament)).scalars().all()
-    tournaments_info = [
-        parse_tournament_full_info(tournament)
-        for tournament in tournaments
-    ]
-    return tournaments_info
+async def read_all_tournaments(page: ListingPage = Depends(), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return await read_listing_page(
+        db,
+        TOURNAMENT_LISTING_COLUMNS,
+        join(Tournament, TournamentType, TournamentType.id == Tournament.tournament_type_id),
+        page
+    )
 
 
 @router.get("/tournaments/{tournament_id}", response_model=TournamentFullInfo, tags=["tournaments endpoints"])
-def read_tournament(tournament_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    tournament = db.execute(select(Tournament).where(Tournament.id == tournament_id)).scalars().first()
+async def read_tournament(tournament_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    tournament = (await db.execute(
+        select(Tournament)
+        .where(Tournament.id == tournament_id)
+        .options(selectinload(Tournament.tournament_type))
+    )).scalars().first()
 
     if tournament is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such tournament not found")
 
-    return parse_tournament_full_info(tournament)
+    etag = tournament_etag(tournament.id, tournament.version)
+    response.headers["ETag"] = etag
+    return not_modified(request, etag) or parse_tournament_full_info(tournament)
+
+
+TOURNAMENT_TYPE_LISTING_COLUMNS = {name: getattr(TournamentType, name) for name in TournamentTypeInfo.model_fields}
 
 
 @router.get("/tournament_types/all", response_model=List[TournamentTypeInfo], tags=["tournament types endpoints"])
-def read_all_tournament_types(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    tournament_types = db.execute(select(TournamentType)).scalars().all()
-    return tournament_types
+async def read_all_tournament_types(page: ListingPage = Depends(), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return await read_listing_page(db, TOURNAMENT_TYPE_LISTING_COLUMNS, TournamentType, page)
 
 
 @router.get("/tournament_types/{type_id}", response_model=TournamentTypeInfo, tags=["tournament types endpoints"])
-def read_tournament_type(type_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    tournament_type = db.execute(select(TournamentType).where(TournamentType.id == type_id)).scalars().first()
+async def read_tournament_type(type_id: int, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    tournament_type = (await db.execute(select(TournamentType).where(TournamentType.id == type_id))).scalars().first()
 
     if tournament_type is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Such tournament not found")
@@ -153,27 +243,36 @@ def read_tournament_type(type_id: int, db: Session = Depends(get_db), current_us
 
 
 @router.get("/football_teams_to_tournaments/football_teams/{tournament_id}", response_model=List[FootballTeamInfo], tags=["football team to tournament endpoints"])
-def read_football_teams_by_tournament_id(tournament_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    football_teams_to_tournaments = db.execute(
-        select(FootballTeamToTournament)
-        .where(FootballTeamToTournament.tournament_id == tournament_id)
-    ).scalars().all()
-
-    football_teams = [
-        football_team_to_tournament.football_team for football_team_to_tournament in football_teams_to_tournaments
-    ]
-    return football_teams
+async def read_football_teams_by_tournament_id(tournament_id: int, request: Request, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    async def compute():
+        football_teams = await db.execute(
+            select(*FootballTeam.__table__.columns)
+            .join(FootballTeamToTournament, FootballTeamToTournament.football_team_id == FootballTeam.id)
+            .where(FootballTeamToTournament.tournament_id == tournament_id)
+            .order_by(FootballTeamToTournament.id)
+        )
+
+        return [parse_football_team_info(football_team) for football_team in football_teams]
+
+    return await tournament_versioned_response(
+        request, db, tournament_id, ("tournament_football_teams", tournament_id), compute,
+        lambda football_teams: [tournament_tag(tournament_id), *(football_team_tag(team.id) for team in football_teams)],
+        List[FootballTeamInfo]
+    )
 
 
 @router.get("/football_teams_to_tournaments/tournaments/{team_id}", response_model=List[TournamentFullInfo], tags=["football team to tournament endpoints"])
-def read_tournaments_by_football_team_id(team_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    football_teams_to_tournaments = db.execute(
-        select(FootballTeamToTournament)
+async def read_tournaments_by_football_team_id(team_id: int, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    db_tournaments = await db.execute(
+        select(*TOURNAMENT_LISTING_COLUMNS.values())
+        .join(TournamentType, TournamentType.id == Tournament.tournament_type_id)
+        .join(FootballTeamToTournament, FootballTeamToTournament.tournament_id == Tournament.id)
         .where(FootballTeamToTournament.football_team_id == team_id)
-    ).scalars().all()
+        .order_by(FootballTeamToTournament.id)
+    )
 
     tournaments = [
-        parse_tournament_full_info(football_team_to_tournament.tournament)
-        for football_team_to_tournament in football_teams_to_tournaments
+        TournamentFullInfo.model_validate(tournament)
+        for tournament in db_tournaments
     ]
-    return tournaments
+    return ModelResponse(tournaments, List[TournamentFullInfo])
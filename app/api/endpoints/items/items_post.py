@@ -1,17 +1,26 @@
 from datetime import datetime, timedelta
 from typing import Annotated, List
 
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, Query, Request
 from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey, delete
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, backref
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, backref
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.endpoints.users import get_current_active_user
 from app.api.utils.schedule_functions import generate_schedule
+from app.api.services.standings_service import rebuild_tournament_standings
+from app.api.services.schedule_service import insert_schedule_matches
+from app.api.services.cache_service import cache, tournament_tag
+from app.api.services.import_service import import_football_team_records, IMPORT_MAX_LINE_LENGTH
+from app.api.services.logo_service import store_logo
+from app.api.services.version_service import bump_tournament_versions
+from app.api.utils.stream_parsers import RECORD_PARSERS
 from app.api.models.models import User, Player, FootballTeam, TournamentType, Tournament, Match, \
     FootballTeamToTournament
 from app.api.schemas.item import FootballTeamCreate, TournamentTypeCreate, TournamentCreate, \
     FootballTeamToTournamentCreate, MatchCreate, FootballTeamInfo, TournamentTypeInfo, TournamentInfo, \
-    FootballTeamToTournamentInfo, MatchInfo
+    FootballTeamToTournamentInfo, MatchInfo, FootballTeamImportInfo
 
 from app.database import get_db
 
@@ -20,38 +29,85 @@ router = APIRouter()
 
 
 @router.post("/football_teams/", response_model=FootballTeamInfo, status_code=status.HTTP_201_CREATED, tags=["football teams endpoints"])
-def create_football_team(football_team: FootballTeamCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def create_football_team(football_team: FootballTeamCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     db_football_team = FootballTeam(**football_team.dict())
+    db_football_team.team_logo = await store_logo(football_team.team_logo)
     db.add(db_football_team)
-    db.commit()
-    db.refresh(db_football_team)
+    await db.commit()
+    await db.refresh(db_football_team)
     return db_football_team
 
 
+@router.post(
+    "/football_teams/import",
+    response_model=FootballTeamImportInfo,
+    tags=["football teams endpoints"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {content_type: {"schema": {"type": "string"}} for content_type in RECORD_PARSERS},
+        }
+    }
+)
+async def import_football_teams(request: Request, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    """
+    Imports football teams from a CSV (with a header row) or NDJSON body read as a stream.
+    Teams that have a tournament_id are enrolled into that tournament. Invalid rows are skipped
+    and reported by line number.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parse_records = RECORD_PARSERS.get(content_type)
+    if parse_records is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail=f"Supported content types: {', '.join(RECORD_PARSERS)}")
+
+    return await import_football_team_records(db, parse_records(request.stream(), IMPORT_MAX_LINE_LENGTH))
+
+
 @router.post("/tournament_types/", response_model=TournamentTypeInfo, status_code=status.HTTP_201_CREATED, tags=["tournament types endpoints"])
-def create_tournament_type(tournament_type: TournamentTypeCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def create_tournament_type(tournament_type: TournamentTypeCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     db_tournament_type = TournamentType(**tournament_type.dict())
     db.add(db_tournament_type)
-    db.commit()
-    db.refresh(db_tournament_type)
+    await db.commit()
+    await db.refresh(db_tournament_type)
     return db_tournament_type
 
 
 @router.post("/tournaments/", response_model=TournamentInfo, status_code=status.HTTP_201_CREATED, tags=["tournaments endpoints"])
-def create_tournament(tournament: TournamentCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def create_tournament(tournament: TournamentCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     db_tournament = Tournament(**tournament.dict())
     db.add(db_tournament)
-    db.commit()
-    db.refresh(db_tournament)
+    await db.commit()
+    await db.refresh(db_tournament)
     return db_tournament
 
 
 @router.post("/football_teams_to_tournaments/", response_model=FootballTeamToTournamentInfo, status_code=status.HTTP_201_CREATED, tags=["football team to tournament endpoints"])
-def add_football_team_to_tournament(football_team_to_tournament: FootballTeamToTournamentCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def add_football_team_to_tournament(football_team_to_tournament: FootballTeamToTournamentCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    db_mapping = (await db.execute(
+        select(FootballTeamToTournament.id)
+        .where(
+            FootballTeamToTournament.tournament_id == football_team_to_tournament.tournament_id,
+            FootballTeamToTournament.football_team_id == football_team_to_tournament.football_team_id
+        )
+    )).scalars().first()
+    already_added = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Football team is already added to this tournament")
+    if db_mapping is not None:
+        raise already_added
+
     db_football_team_to_tournament = FootballTeamToTournament(**football_team_to_tournament.dict())
     db.add(db_football_team_to_tournament)
-    db.commit()
-    db.refresh(db_football_team_to_tournament)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # A concurrent request added the team after the check above
+        await db.rollback()
+        raise already_added
+    await rebuild_tournament_standings(db, db_football_team_to_tournament.tournament_id)
+    await bump_tournament_versions(db, [db_football_team_to_tournament.tournament_id])
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(db_football_team_to_tournament.tournament_id))
+    await db.refresh(db_football_team_to_tournament)
     return db_football_team_to_tournament
 
 
@@ -65,32 +121,29 @@ def add_football_team_to_tournament(football_team_to_tournament: FootballTeamToT
 
 
 @router.post("/matches/schedule/{tournament_id}", response_model=List[MatchInfo], status_code=status.HTTP_201_CREATED, tags=["matches endpoints"])
-def create_tournament_schedule(tournament_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    db_football_teams = db.execute(
+async def create_tournament_schedule(
+    tournament_id: int,
+    legs: int = Query(2, ge=1, description="How many times every pair of teams meets"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    db_football_teams = (await db.execute(
         select(FootballTeamToTournament)
         .where(FootballTeamToTournament.tournament_id == tournament_id)
-    ).scalars().all()
+    )).scalars().all()
 
     if not db_football_teams:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Football teams not found for this tournament or tournament is not exist")
 
     football_teams_list = [item.football_team_id for item in db_football_teams]
-    schedule = generate_schedule(football_teams_list)
-
-    db.execute(delete(Match).where(Match.tournament_id == tournament_id))
-    matches = []
-
-    for i in range(len(schedule)):
-        for match in schedule[i]:
-            db_match = Match(
-                tournament_id=tournament_id,
-                tour_number=i+1,
-                home_team_id=match[0],
-                guest_team_id=match[1]
-            )
-            db.add(db_match)
-            matches.append(db_match)
-
-    db.commit()
+    schedule = generate_schedule(football_teams_list, legs)
+
+    await db.execute(delete(Match).where(Match.tournament_id == tournament_id))
+    matches = await insert_schedule_matches(db, tournament_id, schedule)
+
+    await rebuild_tournament_standings(db, tournament_id)
+    await bump_tournament_versions(db, [tournament_id])
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(tournament_id))
     return matches
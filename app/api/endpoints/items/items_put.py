@@ -1,16 +1,25 @@
 from datetime import datetime, timedelta
 from typing import Annotated, List
 
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, Query, Body
 from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, backref
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, backref
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.endpoints.users import get_current_active_user
+from app.api.services.standings_service import apply_match_result
+from app.api.services.cache_service import cache, tournament_tag, football_team_tag
+from app.api.services.schedule_service import reschedule_tournament_matches
+from app.api.services.match_service import update_match_results, MAX_BULK_MATCH_RESULTS
+from app.api.services.logo_service import store_logo
+from app.api.services.version_service import bump_tournament_versions, bump_football_team_versions
+from app.api.utils.schedule_functions import generate_schedule
 from app.api.models.models import User, Player, FootballTeam, TournamentType, Tournament, Match, \
     FootballTeamToTournament
 from app.api.schemas.item import FootballTeamCreate, TournamentTypeCreate, TournamentCreate, \
     FootballTeamToTournamentCreate, MatchCreate, FootballTeamInfo, TournamentTypeInfo, TournamentInfo, \
-    FootballTeamToTournamentInfo, MatchInfo, MatchUpdate, FootballTeamUpdate, TournamentUpdate, TournamentTypeUpdate
+    FootballTeamToTournamentInfo, MatchInfo, MatchUpdate, FootballTeamUpdate, TournamentUpdate, TournamentTypeUpdate, \
+    ScheduleUpdateInfo, MatchResultUpdate
 
 from app.database import get_db
 
@@ -18,20 +27,43 @@ from app.database import get_db
 router = APIRouter()
 
 
+@router.put("/matches/bulk/{tournament_id}", response_model=List[MatchInfo], tags=["matches endpoints"])
+async def update_matches_results(
+    tournament_id: int,
+    match_results: List[MatchResultUpdate] = Body(..., min_length=1, max_length=MAX_BULK_MATCH_RESULTS),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Updates the results of several matches of a tournament in one transaction.
+    """
+    updated_matches = await update_match_results(db, tournament_id, match_results)
+
+    await bump_tournament_versions(db, [tournament_id])
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(tournament_id))
+    return updated_matches
+
+
 @router.put("/matches/{match_id}", response_model=MatchInfo, tags=["matches endpoints"])
-def update_match_info(
+async def update_match_info(
     match_id: int,
     match_update: MatchUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Updates a match's information.
     """
-    db_match = db.execute(select(Match).where(Match.id == match_id)).scalars().first()
+    # The row lock makes concurrent updates of the match withdraw each other's result, not the same old one twice
+    db_match = (await db.execute(select(Match).where(Match.id == match_id).with_for_update())).scalars().first()
     if db_match is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Current match not found")
 
+    # Withdraw the previous result from the standings before it is overwritten
+    await apply_match_result(db, db_match.tournament_id, db_match.home_team_id, db_match.guest_team_id,
+                             db_match.home_team_score, db_match.guest_team_score, sign=-1)
+
     # Update fields if they are provided in the request
     if match_update.date is not None:
         db_match.date = match_update.date
@@ -40,22 +72,55 @@ def update_match_info(
     if match_update.guest_team_score is not None:
         db_match.guest_team_score = match_update.guest_team_score
 
-    db.commit()
-    db.refresh(db_match)
+    await apply_match_result(db, db_match.tournament_id, db_match.home_team_id, db_match.guest_team_id,
+                             db_match.home_team_score, db_match.guest_team_score)
+    await bump_tournament_versions(db, [db_match.tournament_id])
+
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(db_match.tournament_id))
+    await db.refresh(db_match)
     return db_match
 
 
+@router.put("/matches/schedule/{tournament_id}", response_model=ScheduleUpdateInfo, tags=["matches endpoints"])
+async def update_tournament_schedule(
+    tournament_id: int,
+    legs: int = Query(2, ge=1, description="How many times every pair of teams meets"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Re-generates a tournament's schedule for its current teams, keeping played matches
+    and changing only the unplayed fixtures that differ.
+    """
+    football_teams_list = (await db.execute(
+        select(FootballTeamToTournament.football_team_id)
+        .where(FootballTeamToTournament.tournament_id == tournament_id)
+    )).scalars().all()
+
+    if not football_teams_list:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Football teams not found for this tournament or tournament is not exist")
+
+    changes = await reschedule_tournament_matches(db, tournament_id, generate_schedule(football_teams_list, legs))
+    await bump_tournament_versions(db, [tournament_id])
+
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(tournament_id))
+    return changes
+
+
 @router.put("/football_team/{team_id}", response_model=FootballTeamInfo, tags=["football teams endpoints"])
-def update_football_team_info(
+async def update_football_team_info(
     team_id: int,
     football_team_update: FootballTeamUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Updates a football team's information.
     """
-    db_football_team = db.execute(select(FootballTeam).where(FootballTeam.id == team_id)).scalars().first()
+    db_football_team = (await db.execute(select(FootballTeam).where(FootballTeam.id == team_id))).scalars().first()
     if db_football_team is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Current football team not found")
 
@@ -65,30 +130,32 @@ def update_football_team_info(
     if football_team_update.team_code is not None:
         db_football_team.team_code = football_team_update.team_code
     if football_team_update.team_logo is not None:
-        db_football_team.team_logo = football_team_update.team_logo
+        db_football_team.team_logo = await store_logo(football_team_update.team_logo)
     if football_team_update.country is not None:
         db_football_team.country = football_team_update.country
     if football_team_update.city is not None:
         db_football_team.city = football_team_update.city
     if football_team_update.achievements is not None:
         db_football_team.achievements = football_team_update.achievements
+    await bump_football_team_versions(db, [team_id])
 
-    db.commit()
-    db.refresh(db_football_team)
+    await db.commit()
+    cache.invalidate_tags(football_team_tag(team_id))
+    await db.refresh(db_football_team)
     return db_football_team
 
 
 @router.put("/tournaments/{tournament_id}", response_model=TournamentInfo, tags=["tournaments endpoints"])
-def update_tournament_info(
+async def update_tournament_info(
     tournament_id: int,
     tournament_update: TournamentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Updates a tournament's information.
     """
-    db_tournament = db.execute(select(Tournament).where(Tournament.id == tournament_id)).scalars().first()
+    db_tournament = (await db.execute(select(Tournament).where(Tournament.id == tournament_id))).scalars().first()
     if db_tournament is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Current tournament not found")
 
@@ -101,23 +168,25 @@ def update_tournament_info(
         db_tournament.season = tournament_update.season
     if tournament_update.region is not None:
         db_tournament.region = tournament_update.region
+    await bump_tournament_versions(db, [tournament_id])
 
-    db.commit()
-    db.refresh(db_tournament)
+    await db.commit()
+    cache.invalidate_tags(tournament_tag(tournament_id))
+    await db.refresh(db_tournament)
     return db_tournament
 
 
 @router.put("/tournament_types/{tournament_type_id}", response_model=TournamentTypeInfo, tags=["tournament types endpoints"])
-def update_tournament_type_info(
+async def update_tournament_type_info(
     tournament_type_id: int,
     tournament_type_update: TournamentTypeUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Updates a tournament type's information.
     """
-    db_tournament_type = db.execute(select(TournamentType).where(TournamentType.id == tournament_type_id)).scalars().first()
+    db_tournament_type = (await db.execute(select(TournamentType).where(TournamentType.id == tournament_type_id))).scalars().first()
     if db_tournament_type is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Current tournament type not found")
 
@@ -126,7 +195,9 @@ def update_tournament_type_info(
         db_tournament_type.tournament_type_name = tournament_type_update.tournament_type_name
     if tournament_type_update.description is not None:
         db_tournament_type.description = tournament_type_update.description
+    # Tournaments show the name of their type
+    await bump_tournament_versions(db, select(Tournament.id).where(Tournament.tournament_type_id == tournament_type_id))
 
-    db.commit()
-    db.refresh(db_tournament_type)
+    await db.commit()
+    await db.refresh(db_tournament_type)
     return db_tournament_type
@@ -0,0 +1,75 @@
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.services.cache_service import cache
+from app.api.utils.metrics import PrometheusText
+from app.api.utils.pool_metrics import get_pool_stats
+from app.config import settings, engine
+from app.database import replica_router
+from app.middleware import request_metrics
+
+
+router = APIRouter()
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_pool_metrics(page: PrometheusText):
+    pools = [("primary", engine)] + [
+        (replica["url"], replica_engine)
+        for replica, replica_engine in zip(replica_router.stats(), replica_router.engines)
+    ]
+    pools = [(name, get_pool_stats(pool_engine.sync_engine)) for name, pool_engine in pools]
+    pools = [(name, stats) for name, stats in pools if "checkouts" in stats]
+
+    for counter, help_text in (
+        ("checkouts", "Connections checked out of the pool."),
+        ("checkout_timeouts", "Checkouts that timed out waiting for a connection."),
+        ("connections_created", "Connections opened by the pool."),
+        ("connections_invalidated", "Connections invalidated by the pool."),
+    ):
+        page.metric(f"db_pool_{counter}_total", "counter", help_text)
+        for name, stats in pools:
+            page.sample(f"db_pool_{counter}_total", stats[counter], {"pool": name})
+
+    page.metric("db_pool_checked_out", "gauge", "Connections currently checked out.")
+    for name, stats in pools:
+        page.sample("db_pool_checked_out", stats["checked_out"], {"pool": name})
+
+    page.metric("db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection.")
+    for name, stats in pools:
+        page.histogram("db_pool_checkout_wait_seconds", stats["checkout_wait_seconds"], {"pool": name})
+
+
+def render_cache_metrics(page: PrometheusText):
+    stats = cache.stats()
+    page.metric("cache_hits_total", "counter", "Read cache hits.")
+    page.sample("cache_hits_total", stats["hits"])
+    page.metric("cache_misses_total", "counter", "Read cache misses.")
+    page.sample("cache_misses_total", stats["misses"])
+    page.metric("cache_entries", "gauge", "Entries held by the read cache.")
+    page.sample("cache_entries", stats["size"])
+    page.metric("cache_coalesced_total", "counter", "Cache misses that waited for a concurrent identical computation.")
+    page.sample("cache_coalesced_total", stats["coalesced"])
+    page.metric("cache_coalesce_timeouts_total", "counter", "Coalesced misses that gave up waiting and computed by themselves.")
+    page.sample("cache_coalesce_timeouts_total", stats["coalesce_timeouts"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics(request: Request):
+    """
+    Request, database pool and cache metrics in the Prometheus text format.
+    """
+    if settings.METRICS_TOKEN is not None:
+        authorization = request.headers.get("authorization", "")
+        if not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    page = PrometheusText()
+    request_metrics.render(page)
+    render_pool_metrics(page)
+    render_cache_metrics(page)
+    return PlainTextResponse(page.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -4,20 +4,22 @@ from typing import Annotated, List
 from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, select, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, backref
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, backref
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas.user import UserResponse, UserCreate, PlayerInfo, PlayerUpdate, Token
 from app.api.models.models import User, Player
+from app.api.services.user_service import password_hasher, get_principal
+from app.api.utils.pagination import ListingPage, read_listing_page
 from app.config import settings, engine, SessionLocal, oauth2_scheme
-from app.database import get_db
+from app.database import get_db, get_read_db
 
-import bcrypt
 import jwt
 
 router = APIRouter()
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
@@ -25,25 +27,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    user = db.execute(select(User).where(User.username == username)).scalars().first()
+    user = await get_principal(username)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     return user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: UserResponse = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
 
-# Hashing Function
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
-
-
 # Token Creation
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -56,29 +51,21 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-# Authentication Function
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.execute(select(User).where(User.username == username)).scalars().first()
-    if not user:
-        return None
-    if bcrypt.checkpw(password.encode("utf-8"), user.hashed_password.encode("utf-8")):
-        return user
-    return None
+async def get_user_by_username(db: AsyncSession, username: str):
+    return (await db.execute(select(User).where(User.username == username))).scalars().first()
 
 
-# API Endpoints
-# Auth Endpoints
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["account managing"])
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.execute(select(User).where(User.username == user.username)).scalars().first()
-    if db_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
+async def update_hashed_password(db: AsyncSession, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    await db.commit()
+    await db.refresh(user)
 
-    hashed_password = hash_password(user.password)
+
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: str):
     new_user = User(username=user.username, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     db_player = Player(
         user_id=new_user.id,
@@ -89,15 +76,42 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         phone=user.phone,
     )
     db.add(db_player)
-    db.commit()
-    db.refresh(db_player)
+    await db.commit()
+    await db.refresh(new_user)
 
     return new_user
 
 
+# Authentication Function
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    if not await password_hasher.verify(password, user.hashed_password):
+        return None
+
+    # Transparently upgrade hashes made with a different cost factor
+    if password_hasher.needs_rehash(user.hashed_password):
+        hashed_password = await password_hasher.hash(password)
+        await update_hashed_password(db, user, hashed_password)
+    return user
+
+
+# API Endpoints
+# Auth Endpoints
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["account managing"])
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user_by_username(db, user.username)
+    if db_user:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
+
+    hashed_password = await password_hasher.hash(user.password)
+    return await create_user(db, user, hashed_password)
+
+
 @router.post("/token", response_model=Token, tags=["account managing"])
-def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -114,26 +128,28 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 
+PLAYER_LISTING_COLUMNS = {name: getattr(Player, name) for name in PlayerInfo.model_fields}
+
+
 @router.get("/players/all", response_model=List[PlayerInfo], tags=["admin panel"])
-def read_all_players(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    db_players = db.execute(select(Player)).scalars().all()
-    return db_players
+async def read_all_players(page: ListingPage = Depends(), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return await read_listing_page(db, PLAYER_LISTING_COLUMNS, Player, page)
 
 
 @router.get("/players/{player_id}", response_model=PlayerInfo, tags=["player panel"])
-def read_player(player_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    player = db.execute(select(Player).where(Player.id == player_id)).scalars().first()
+async def read_player(player_id: int, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    player = (await db.execute(select(Player).where(Player.id == player_id))).scalars().first()
     if player is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
     return player
 
 
 @router.put("/players/{player_id}", response_model=PlayerInfo, tags=["player panel"])
-def update_player(player_id: int, player_update: PlayerUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def update_player(player_id: int, player_update: PlayerUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     """
     Updates a resident's information.
     """
-    db_player = db.execute(select(Player).where(Player.id == player_id)).scalars().first()
+    db_player = (await db.execute(select(Player).where(Player.id == player_id))).scalars().first()
     if db_player is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resident not found")
 
@@ -149,6 +165,6 @@ def update_player(player_id: int, player_update: PlayerUpdate, db: Session = Dep
     if player_update.phone is not None:
         db_player.phone = player_update.phone
 
-    db.commit()
-    db.refresh(db_player)
+    await db.commit()
+    await db.refresh(db_player)
     return db_player
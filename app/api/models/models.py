@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey, UniqueConstraint, \
+    Index, text
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from datetime import datetime
 
@@ -8,18 +9,18 @@ from app.database import Base
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
 
-    player = relationship("Player", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    player = relationship("Player", back_populates="user", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Player(Base):
     __tablename__ = "players"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, index=True)
     surname = Column(String)
     name = Column(String)
@@ -29,22 +30,25 @@ class Player(Base):
     phone = Column(String)
 
     user = relationship("User", back_populates="player")
-    football_teams = relationship("FootballTeam", back_populates="player", cascade="all, delete-orphan")
-    tournaments = relationship("Tournament", back_populates="player", cascade="all, delete-orphan")
+    football_teams = relationship("FootballTeam", back_populates="player", cascade="all, delete-orphan", passive_deletes=True)
+    tournaments = relationship("Tournament", back_populates="player", cascade="all, delete-orphan", passive_deletes=True)
     # matches = relationship("Match", back_populates="player", cascade="all, delete-orphan")
 
 
 class FootballTeam(Base):
     __tablename__ = "football_teams"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), index=True)
     team_name = Column(String)
     team_code = Column(String)
-    team_logo = Column(Text)
+    # sha256 of the logo in the logo store
+    team_logo = Column(String(64))
     country = Column(String)
     city = Column(String)
     achievements = Column(Text)
+    # Bumped by every write that changes the team, see version_service
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     player = relationship(
         "Player",
@@ -54,55 +58,69 @@ class FootballTeam(Base):
         "Match",
         foreign_keys="[Match.home_team_id]",
         back_populates="home_team",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
     guest_matches = relationship(
         "Match",
         foreign_keys="[Match.guest_team_id]",
         back_populates="guest_team",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
     tournaments = relationship(
         "FootballTeamToTournament",
-        back_populates="football_team"
+        back_populates="football_team",
+        passive_deletes=True
     )
 
 
 class TournamentType(Base):
     __tablename__ = "tournament_types"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     tournament_type_name = Column(String)
     description = Column(String)
 
     tournaments = relationship(
         "Tournament",
         back_populates="tournament_type",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
 
 
 class Tournament(Base):
     __tablename__ = "tournaments"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), index=True)
     tournament_type_id = Column(Integer, ForeignKey("tournament_types.id", ondelete="CASCADE"), index=True)
     tournament_name = Column(String)
     season = Column(String)
     region = Column(String)
+    # Bumped by every write that changes what the tournament's endpoints return, see version_service
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     player = relationship("Player", back_populates="tournaments")
     tournament_type = relationship("TournamentType", back_populates="tournaments")
-    matches = relationship("Match", back_populates="tournament", cascade="all, delete")
-    football_teams = relationship("FootballTeamToTournament", back_populates="tournament")
+    matches = relationship("Match", back_populates="tournament", cascade="all, delete", passive_deletes=True)
+    football_teams = relationship("FootballTeamToTournament", back_populates="tournament", passive_deletes=True)
 
 
 class FootballTeamToTournament(Base):
     __tablename__ = "football_teams_to_tournaments"
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        Index(
+            "ux_football_teams_to_tournaments_tournament_team",
+            "tournament_id", "football_team_id",
+            unique=True,
+            postgresql_include=["id"]
+        ),
+    )
+    id = Column(Integer, primary_key=True)
     football_team_id = Column(Integer, ForeignKey("football_teams.id", ondelete="CASCADE"), index=True)
-    tournament_id = Column(Integer, ForeignKey("tournaments.id", ondelete="CASCADE"), index=True)
+    tournament_id = Column(Integer, ForeignKey("tournaments.id", ondelete="CASCADE"))
 
     football_team = relationship("FootballTeam", back_populates="tournaments")
     tournament = relationship("Tournament", back_populates="football_teams")
@@ -110,10 +128,20 @@ class FootballTeamToTournament(Base):
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        Index("ix_matches_tournament_id_tour_number", "tournament_id", "tour_number"),
+        # Played matches of a tournament, covers the standings aggregate without touching the heap
+        Index(
+            "ix_matches_tournament_id_played",
+            "tournament_id",
+            postgresql_include=["home_team_id", "guest_team_id", "home_team_score", "guest_team_score"],
+            postgresql_where=text("home_team_score IS NOT NULL AND guest_team_score IS NOT NULL")
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     # player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), index=True)
-    tournament_id = Column(Integer, ForeignKey("tournaments.id", ondelete="CASCADE"), index=True)
+    tournament_id = Column(Integer, ForeignKey("tournaments.id", ondelete="CASCADE"))
     tour_number = Column(Integer)
     date = Column(DateTime, default=datetime.utcnow)
     home_team_id = Column(Integer, ForeignKey("football_teams.id", ondelete="CASCADE"), index=True)
@@ -134,3 +162,23 @@ class Match(Base):
         foreign_keys=[guest_team_id],
         back_populates="guest_matches"
     )
+
+
+class TournamentStanding(Base):
+    __tablename__ = "tournament_standings"
+    __table_args__ = (
+        UniqueConstraint("tournament_id", "football_team_id", name="uq_tournament_standings_tournament_team"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tournament_id = Column(Integer, ForeignKey("tournaments.id", ondelete="CASCADE"), nullable=False)
+    football_team_id = Column(Integer, ForeignKey("football_teams.id", ondelete="CASCADE"), nullable=False, index=True)
+    matches_played = Column(Integer, nullable=False, default=0)
+    score = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    draws = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    goals_scored = Column(Integer, nullable=False, default=0)
+    goals_conceded = Column(Integer, nullable=False, default=0)
+
+    football_team = relationship("FootballTeam")
@@ -1,5 +1,7 @@
-def TOURNAMENT_STANDINGS_SQL(tournament_id):
-    return f"""
+from sqlalchemy import Integer, bindparam, text
+
+
+TOURNAMENT_STANDINGS_SQL = text("""
         WITH team_results AS (
             SELECT
                 home_team_id AS team_id,
@@ -22,7 +24,7 @@ def TOURNAMENT_STANDINGS_SQL(tournament_id):
             WHERE
                 home_team_score IS NOT NULL
                 AND guest_team_score IS NOT NULL
-                AND tournament_id = {tournament_id}
+                AND tournament_id = :tournament_id
         
             UNION ALL
         
@@ -47,10 +49,10 @@ def TOURNAMENT_STANDINGS_SQL(tournament_id):
             WHERE
                 home_team_score IS NOT NULL
                 AND guest_team_score IS NOT NULL
-                AND tournament_id = {tournament_id}
+                AND tournament_id = :tournament_id
         ),
         tournament_teams AS (
-            SELECT
+            SELECT DISTINCT
                 FT.id AS team_id,
                 FT.team_name
             FROM
@@ -59,9 +61,10 @@ def TOURNAMENT_STANDINGS_SQL(tournament_id):
                 football_teams_to_tournaments AS FTT
                 ON FT.id = FTT.football_team_id
             WHERE
-                FTT.tournament_id = {tournament_id}
+                FTT.tournament_id = :tournament_id
         )
         SELECT
+            TT.team_id,
             TT.team_name,
             COUNT(TR.team_id) AS matches_played,
             (3 * COALESCE(SUM(TR.wins), 0) + COALESCE(SUM(TR.draws), 0)) AS score,
@@ -82,4 +85,4 @@ def TOURNAMENT_STANDINGS_SQL(tournament_id):
             goal_difference DESC,
             goals_scored DESC,
             TT.team_name;
-    """
+    """).bindparams(bindparam("tournament_id", type_=Integer))
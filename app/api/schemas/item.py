@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Annotated, List, Dict
-from pydantic import BaseModel, Field, validator, field_validator
+from pydantic import BaseModel, ConfigDict, Field, validator, field_validator
 
 
 # Create models
@@ -9,6 +9,7 @@ class FootballTeamCreate(BaseModel):
     player_id: int
     team_name: str = Field(..., min_length=2)
     team_code: str = Field(..., min_length=2, max_length=4)
+    # Base64 image (or data URL), or the hash of an already stored logo
     team_logo: str
     country: str
     city: str
@@ -33,6 +34,10 @@ class FootballTeamToTournamentCreate(BaseModel):
     tournament_id: int
 
 
+class FootballTeamImport(FootballTeamCreate):
+    tournament_id: int | None = None
+
+
 class MatchCreate(BaseModel):
     tournament_id: int
     tour_number: int
@@ -44,18 +49,24 @@ class MatchCreate(BaseModel):
 
 
 # Info models
-class FootballTeamInfo(BaseModel):
+class InfoModel(BaseModel):
+    # Built straight from ORM objects and result rows
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FootballTeamInfo(InfoModel):
     id: int
     player_id: int
     team_name: str
     team_code: str
+    # Hash of the logo, the image is served by GET /logos/{team_logo}
     team_logo: str | None = None
     country: str
     city: str
     achievements: str
 
 
-class TournamentInfo(BaseModel):
+class TournamentInfo(InfoModel):
     id: int
     player_id: int
     tournament_name: str
@@ -64,19 +75,19 @@ class TournamentInfo(BaseModel):
     region: str
 
 
-class TournamentTypeInfo(BaseModel):
+class TournamentTypeInfo(InfoModel):
     id: int
     tournament_type_name: str
     description: str
 
 
-class FootballTeamToTournamentInfo(BaseModel):
+class FootballTeamToTournamentInfo(InfoModel):
     id: int
     football_team_id: int
     tournament_id: int
 
 
-class MatchInfo(BaseModel):
+class MatchInfo(InfoModel):
     id: int
     tournament_id: int
     tour_number: int
@@ -88,7 +99,7 @@ class MatchInfo(BaseModel):
 
 
 # Full info models
-class TournamentFullInfo(BaseModel):
+class TournamentFullInfo(InfoModel):
     id: int
     player_id: int
     tournament_name: str
@@ -97,7 +108,7 @@ class TournamentFullInfo(BaseModel):
     region: str
 
 
-class MatchFullInfo(BaseModel):
+class MatchFullInfo(InfoModel):
     id: int
     tournament_id: int
     tour_number: int
@@ -108,7 +119,26 @@ class MatchFullInfo(BaseModel):
     guest_team_score: int | None = None
 
 
-class FootballTeamTournamentStatistics(BaseModel):
+class ScheduleUpdateInfo(BaseModel):
+    kept: int
+    inserted: List[MatchInfo]
+    renumbered: List[MatchInfo]
+    deleted_match_ids: List[int]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class FootballTeamImportInfo(BaseModel):
+    imported: int = 0
+    enrolled: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+
+class FootballTeamTournamentStatistics(InfoModel):
     team_name: str
     team_logo: str | None = None
     matches_played: int
@@ -147,3 +177,7 @@ class MatchUpdate(BaseModel):
     date: datetime | None = None
     home_team_score: int | None = None
     guest_team_score: int | None = None
+
+
+class MatchResultUpdate(MatchUpdate):
+    match_id: int
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.api.utils.single_flight import SingleFlight
+from app.config import settings
+
+
+def tournament_tag(tournament_id: int) -> str:
+    return f"tournament:{tournament_id}"
+
+
+def football_team_tag(football_team_id: int) -> str:
+    return f"football_team:{football_team_id}"
+
+
+class CacheBackend:
+    """
+    Interface of the read cache. Entries are tagged so write handlers can drop everything
+    that depends on a tournament or a football team without knowing the exact keys.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.single_flight = SingleFlight(settings.CACHE_COALESCE_WAIT_SECONDS)
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, tags=()):
+        raise NotImplementedError
+
+    def invalidate_tags(self, *tags):
+        raise NotImplementedError
+
+    def invalidate_key(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+    async def get_or_compute(self, key, compute, tags):
+        """
+        Returns the cached value of key or stores the result of awaiting compute().
+        tags may be an iterable or a callable building the tags from the computed value.
+        Concurrent misses of the same key share a single computation.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        async def compute_and_set():
+            value = await compute()
+            self.set(key, value, tags(value) if callable(tags) else tags)
+            return value
+
+        return await self.single_flight.do(key, compute_and_set)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "size": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.single_flight.followers,
+            "coalesce_timeouts": self.single_flight.follower_timeouts,
+            "in_flight": self.single_flight.in_flight(),
+        }
+
+
+class NullCache(CacheBackend):
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def set(self, key, value, tags=()):
+        pass
+
+    def invalidate_tags(self, *tags):
+        pass
+
+    def invalidate_key(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def size(self) -> int:
+        return 0
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with a per-entry TTL and a bounded number of entries.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags=()):
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def create_cache() -> CacheBackend:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "none":
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+
+cache = create_cache()
@@ -0,0 +1,11 @@
+from app.api.services.cache_service import MemoryCache
+from app.config import settings
+
+
+compressed_responses = MemoryCache(settings.COMPRESSION_CACHE_MAX_ENTRIES, settings.COMPRESSION_CACHE_TTL_SECONDS)
+
+compression_levels = {
+    "gzip": settings.COMPRESSION_GZIP_LEVEL,
+    "br": settings.COMPRESSION_BROTLI_LEVEL,
+    "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+}
@@ -0,0 +1,117 @@
+import math
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models.models import Player, FootballTeam, Tournament, FootballTeamToTournament
+from app.api.schemas.item import FootballTeamImport, FootballTeamImportInfo, ImportRowError
+from app.api.services.standings_service import rebuild_tournament_standings
+from app.api.services.cache_service import cache, tournament_tag
+from app.api.services.logo_service import save_logo
+from app.api.services.version_service import bump_tournament_versions
+from app.config import settings
+
+
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
+# A row may carry a logo of LOGO_MAX_BYTES in base64, a third longer than the logo, next to the other fields
+IMPORT_MAX_LINE_LENGTH = 4 * math.ceil(settings.LOGO_MAX_BYTES / 3) + 64 * 1024
+
+
+def report_row_error(report: FootballTeamImportInfo, line_number: int, error: str):
+    report.failed += 1
+    if len(report.errors) < MAX_IMPORT_ERRORS:
+        report.errors.append(ImportRowError(line=line_number, error=error))
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, details['loc']))}: {details['msg']}"
+        for details in error.errors()
+    )
+
+
+async def insert_football_teams_batch(db: AsyncSession, batch, report: FootballTeamImportInfo):
+    """
+    Inserts a batch of validated teams and their enrollments in one transaction.
+    Rows referring to a missing player or tournament are reported instead of failing the batch.
+    """
+    player_ids = {team.player_id for _, team in batch}
+    tournament_ids = {team.tournament_id for _, team in batch if team.tournament_id is not None}
+    existing_player_ids = set((await db.execute(select(Player.id).where(Player.id.in_(player_ids)))).scalars())
+    existing_tournament_ids = set()
+    if tournament_ids:
+        existing_tournament_ids = set((await db.execute(
+            select(Tournament.id).where(Tournament.id.in_(tournament_ids))
+        )).scalars())
+
+    teams = []
+    for line_number, team in batch:
+        if team.player_id not in existing_player_ids:
+            report_row_error(report, line_number, f"Player {team.player_id} does not exist")
+        elif team.tournament_id is not None and team.tournament_id not in existing_tournament_ids:
+            report_row_error(report, line_number, f"Tournament {team.tournament_id} does not exist")
+        else:
+            teams.append(team)
+
+    if not teams:
+        return
+
+    team_ids = (await db.execute(
+        insert(FootballTeam).returning(FootballTeam.id, sort_by_parameter_order=True),
+        [team.model_dump(exclude={"tournament_id"}) for team in teams]
+    )).scalars().all()
+
+    enrollments = [
+        {"football_team_id": team_id, "tournament_id": team.tournament_id}
+        for team_id, team in zip(team_ids, teams)
+        if team.tournament_id is not None
+    ]
+    enrolled_tournament_ids = {enrollment["tournament_id"] for enrollment in enrollments}
+    if enrollments:
+        await db.execute(insert(FootballTeamToTournament), enrollments)
+        # In id order, so concurrent batches lock the tournaments in the same order
+        for tournament_id in sorted(enrolled_tournament_ids):
+            await rebuild_tournament_standings(db, tournament_id)
+        await bump_tournament_versions(db, enrolled_tournament_ids)
+
+    await db.commit()
+    cache.invalidate_tags(*map(tournament_tag, enrolled_tournament_ids))
+    report.imported += len(teams)
+    report.enrolled += len(enrollments)
+
+
+async def import_football_team_records(db: AsyncSession, records) -> FootballTeamImportInfo:
+    """
+    Imports football teams from (line number, record, error) tuples of a stream parser.
+    Records are validated one by one and written in batches of IMPORT_BATCH_SIZE, each batch
+    in its own transaction, so only one batch is held in memory whatever the size of the upload.
+    Teams with a tournament_id are enrolled into that tournament.
+    """
+    report = FootballTeamImportInfo()
+    batch = []
+
+    async for line_number, record, error in records:
+        if error is None:
+            try:
+                team = FootballTeamImport.model_validate(record)
+                team.team_logo = await run_in_threadpool(save_logo, team.team_logo)
+                batch.append((line_number, team))
+            except ValidationError as validation_error:
+                error = format_validation_error(validation_error)
+            except ValueError as logo_error:
+                error = str(logo_error)
+        if error is not None:
+            report_row_error(report, line_number, error)
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await insert_football_teams_batch(db, batch, report)
+            batch = []
+
+    if batch:
+        await insert_football_teams_batch(db, batch, report)
+
+    report.errors.sort(key=lambda row_error: row_error.line)
+    return report
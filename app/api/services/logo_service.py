@@ -0,0 +1,86 @@
+import base64
+import binascii
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.api.utils.blob_store import BlobStore, BLOB_HASH_PATTERN
+
+
+logo_store = BlobStore(settings.LOGO_STORAGE_DIR)
+
+# Leading bytes of the accepted logo formats. Only raster images are accepted: logos are served
+# publicly from the API's origin, where an SVG could carry scripts
+LOGO_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def sniff_logo_media_type(head: bytes) -> str | None:
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, media_type in LOGO_SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    return None
+
+
+def decode_logo(team_logo: str) -> bytes:
+    """
+    Decodes a logo sent as base64, optionally as a data URL. It must be a PNG, JPEG, GIF or WebP image.
+    """
+    if team_logo.startswith("data:"):
+        team_logo = team_logo.partition(",")[2]
+    try:
+        logo = base64.b64decode(team_logo, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("team_logo must be a base64 encoded image or the hash of a stored logo")
+    if len(logo) > settings.LOGO_MAX_BYTES:
+        raise ValueError(f"team_logo is larger than {settings.LOGO_MAX_BYTES} bytes")
+    if sniff_logo_media_type(logo[:16]) is None:
+        raise ValueError("team_logo must be a PNG, JPEG, GIF or WebP image")
+    return logo
+
+
+def save_logo(team_logo: str | None) -> str | None:
+    """
+    Stores a logo and returns its hash. A hash of an already stored logo is returned as is,
+    so payloads read from the API can be sent back unchanged.
+    """
+    if not team_logo:
+        return None
+    if BLOB_HASH_PATTERN.fullmatch(team_logo):
+        if not logo_store.exists(team_logo):
+            raise ValueError(f"Logo {team_logo} does not exist")
+        return team_logo
+    return logo_store.put(decode_logo(team_logo))
+
+
+async def store_logo(team_logo: str | None) -> str | None:
+    try:
+        return await run_in_threadpool(save_logo, team_logo)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+
+def logo_media_type(logo_hash: str) -> str | None:
+    """
+    Returns the media type of a stored logo, None when there is no such logo.
+    """
+    if not logo_store.exists(logo_hash):
+        return None
+    try:
+        with open(logo_store.path(logo_hash), "rb") as logo_file:
+            head = logo_file.read(16)
+    except FileNotFoundError:
+        return None
+    # Logos stored before uploads were checked may be anything, they are never served as an image
+    return sniff_logo_media_type(head) or "application/octet-stream"
+
+
+async def find_logo(logo_hash: str) -> str | None:
+    return await run_in_threadpool(logo_media_type, logo_hash)
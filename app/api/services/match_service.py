@@ -0,0 +1,74 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, values, column, literal, func, Integer, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models.models import Match
+from app.api.schemas.item import MatchInfo, MatchResultUpdate
+from app.api.services.standings_service import apply_match_results
+
+
+MAX_BULK_MATCH_RESULTS = 1000
+
+
+async def update_match_results(db: AsyncSession, tournament_id: int, match_results: list[MatchResultUpdate]) -> list[MatchInfo]:
+    """
+    Writes the results of several matches of a tournament with a single UPDATE ... FROM (VALUES ...)
+    statement. Fields that are not provided keep their stored value, like in the single match update.
+    The standings are updated by the difference between the old and the new results of the matches.
+    """
+    match_ids = [match_result.match_id for match_result in match_results]
+    if len(set(match_ids)) != len(match_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Every match can be updated only once per request")
+
+    # The row locks keep concurrent updates of the same matches from withdrawing the same old results,
+    # taken in id order so two batches sharing matches do not deadlock
+    old_matches = (await db.execute(
+        select(Match.id, Match.home_team_id, Match.guest_team_id, Match.home_team_score, Match.guest_team_score)
+        .where(Match.tournament_id == tournament_id, Match.id.in_(match_ids))
+        .order_by(Match.id)
+        .with_for_update()
+    )).all()
+    tournament_match_ids = {match.id for match in old_matches}
+    missing_ids = [match_id for match_id in match_ids if match_id not in tournament_match_ids]
+    if missing_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Matches not found in this tournament: {missing_ids}")
+
+    # Every value is sent as a typed parameter, PostgreSQL would type a column that is NULL in all rows as text
+    matches = Match.__table__
+    results = values(
+        column("match_id", Integer),
+        column("home_team_score", Integer),
+        column("guest_team_score", Integer),
+        column("date", DateTime),
+        name="results"
+    ).data([
+        (
+            literal(match_result.match_id, Integer),
+            literal(match_result.home_team_score, Integer),
+            literal(match_result.guest_team_score, Integer),
+            literal(match_result.date, DateTime),
+        )
+        for match_result in match_results
+    ]).cte("results")
+
+    updated_matches = (await db.execute(
+        update(matches)
+        .add_cte(results)
+        .where(matches.c.id == results.c.match_id, matches.c.tournament_id == tournament_id)
+        .values(
+            home_team_score=func.coalesce(results.c.home_team_score, matches.c.home_team_score),
+            guest_team_score=func.coalesce(results.c.guest_team_score, matches.c.guest_team_score),
+            date=func.coalesce(results.c.date, matches.c.date),
+        )
+        .returning(*matches.columns)
+    )).all()
+
+    await apply_match_results(db, tournament_id, [
+        (match.home_team_id, match.guest_team_id, match.home_team_score, match.guest_team_score, sign)
+        for matches_results, sign in ((old_matches, -1), (updated_matches, 1))
+        for match in matches_results
+    ])
+
+    updated_matches = {match.id: MatchInfo.model_validate(match._mapping) for match in updated_matches}
+    return [updated_matches[match_id] for match_id in match_ids]
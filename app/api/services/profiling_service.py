@@ -0,0 +1,5 @@
+from app.api.utils.profiler import ProfileStore
+from app.config import settings
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
@@ -0,0 +1,32 @@
+from sqlalchemy import delete, select
+
+from app.api.models.models import Tournament, Match
+from app.api.services.cache_service import cache, tournament_tag
+from app.api.services.version_service import bump_tournament_versions
+from app.config import settings, SessionLocal
+
+
+async def purge_tournament(tournament_id: int):
+    """
+    Deletes a tournament's matches in short transactions of PURGE_BATCH_SIZE rows, then the tournament
+    itself, so a large tournament never holds row locks for the whole removal.
+    """
+    async with SessionLocal() as db:
+        while True:
+            batch = (
+                select(Match.id)
+                .where(Match.tournament_id == tournament_id)
+                .limit(settings.PURGE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = await db.execute(delete(Match).where(Match.id.in_(batch)))
+            # Readers see the schedule shrinking until the tournament is gone
+            await bump_tournament_versions(db, [tournament_id])
+            await db.commit()
+            if result.rowcount < settings.PURGE_BATCH_SIZE:
+                break
+
+        await db.execute(delete(Tournament).where(Tournament.id == tournament_id))
+        await db.commit()
+
+    cache.invalidate_tags(tournament_tag(tournament_id))
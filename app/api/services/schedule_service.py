@@ -0,0 +1,98 @@
+from itertools import islice
+
+from sqlalchemy import insert, update, delete, select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models.models import Match
+from app.api.schemas.item import MatchInfo
+from app.api.utils.schedule_functions import plan_reschedule
+
+
+SCHEDULE_INSERT_BATCH_SIZE = 1000
+
+
+def iter_schedule_rows(tournament_id: int, schedule):
+    for tour_number, tour_matches in enumerate(schedule, start=1):
+        for home_team_id, guest_team_id in tour_matches:
+            yield {
+                "tournament_id": tournament_id,
+                "tour_number": tour_number,
+                "home_team_id": home_team_id,
+                "guest_team_id": guest_team_id,
+            }
+
+
+async def insert_match_rows(db: AsyncSession, rows) -> list[MatchInfo]:
+    """
+    Inserts matches with multi-row INSERT ... RETURNING statements, one per batch,
+    without creating ORM instances for them.
+    """
+    statement = insert(Match).returning(*Match.__table__.columns, sort_by_parameter_order=True)
+    rows = iter(rows)
+    matches = []
+
+    while batch := list(islice(rows, SCHEDULE_INSERT_BATCH_SIZE)):
+        matches.extend(
+            MatchInfo.model_validate(match._mapping)
+            for match in await db.execute(statement, batch)
+        )
+
+    return matches
+
+
+async def insert_schedule_matches(db: AsyncSession, tournament_id: int, schedule) -> list[MatchInfo]:
+    return await insert_match_rows(db, iter_schedule_rows(tournament_id, schedule))
+
+
+async def reschedule_tournament_matches(db: AsyncSession, tournament_id: int, schedule) -> dict:
+    """
+    Brings the stored matches of a tournament in line with a newly generated schedule, see plan_reschedule.
+    Played matches are never modified or deleted and unplayed ones are moved only when they clash
+    with a played match, so the writes are proportional to the size of the change.
+    """
+    matches = (await db.execute(
+        select(*Match.__table__.columns)
+        .where(Match.tournament_id == tournament_id)
+        .order_by(Match.tour_number, Match.id)
+    )).all()
+
+    kept, moved, inserted, deleted_match_ids = plan_reschedule(matches, schedule)
+
+    renumbered = []
+    if moved:
+        await db.execute(
+            update(Match.__table__)
+            .where(Match.__table__.c.id == bindparam("match_id"))
+            .values(tour_number=bindparam("new_tour_number")),
+            [{"match_id": match_id, "new_tour_number": tour_number} for match_id, tour_number in moved]
+        )
+        renumbered_ids = [match_id for match_id, _ in moved]
+        for start in range(0, len(renumbered_ids), SCHEDULE_INSERT_BATCH_SIZE):
+            renumbered.extend(
+                MatchInfo.model_validate(match._mapping)
+                for match in await db.execute(
+                    select(*Match.__table__.columns)
+                    .where(Match.id.in_(renumbered_ids[start:start + SCHEDULE_INSERT_BATCH_SIZE]))
+                    .order_by(Match.tour_number, Match.id)
+                )
+            )
+
+    for start in range(0, len(deleted_match_ids), SCHEDULE_INSERT_BATCH_SIZE):
+        await db.execute(delete(Match).where(Match.id.in_(deleted_match_ids[start:start + SCHEDULE_INSERT_BATCH_SIZE])))
+
+    new_rows = (
+        {
+            "tournament_id": tournament_id,
+            "tour_number": tour_number,
+            "home_team_id": home_team_id,
+            "guest_team_id": guest_team_id,
+        }
+        for tour_number, home_team_id, guest_team_id in inserted
+    )
+
+    return {
+        "kept": kept,
+        "inserted": await insert_match_rows(db, new_rows),
+        "renumbered": renumbered,
+        "deleted_match_ids": deleted_match_ids,
+    }
@@ -0,0 +1,152 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import select, update, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models.models import FootballTeam, Tournament, TournamentStanding
+from app.api.repositories.tournament_queries import TOURNAMENT_STANDINGS_SQL
+
+
+def is_match_played(home_team_score, guest_team_score):
+    return home_team_score is not None and guest_team_score is not None
+
+
+def match_result_delta(scored, conceded):
+    """
+    Returns the standings delta of a single played match for one side.
+    """
+    wins = int(scored > conceded)
+    draws = int(scored == conceded)
+    return {
+        "matches_played": 1,
+        "score": 3 * wins + draws,
+        "wins": wins,
+        "draws": draws,
+        "losses": int(scored < conceded),
+        "goals_scored": scored,
+        "goals_conceded": conceded,
+    }
+
+
+async def lock_tournament_standings(db: AsyncSession, tournament_id: int):
+    """
+    Serializes the writers of a tournament's standings until the transaction ends. Without it a rebuild
+    overlapping a match update drops the update's delta, and two overlapping rebuilds insert the same rows.
+    Callers lock the matches they change first, so locks are always taken in match, then tournament order.
+    """
+    await db.execute(select(Tournament.id).where(Tournament.id == tournament_id).with_for_update())
+
+
+async def apply_team_delta(db: AsyncSession, tournament_id: int, football_team_id: int, delta: dict, sign: int):
+    await db.execute(
+        update(TournamentStanding)
+        .where(
+            TournamentStanding.tournament_id == tournament_id,
+            TournamentStanding.football_team_id == football_team_id
+        )
+        .values({
+            getattr(TournamentStanding, field): getattr(TournamentStanding, field) + sign * value
+            for field, value in delta.items()
+        })
+    )
+
+
+async def apply_match_result(db: AsyncSession, tournament_id: int, home_team_id: int, guest_team_id: int,
+                       home_team_score, guest_team_score, sign: int = 1):
+    """
+    Adds (sign=1) or withdraws (sign=-1) a played match from the standings of both teams.
+    Does nothing for matches without a result. Must be called inside the transaction that writes the match.
+    """
+    if not is_match_played(home_team_score, guest_team_score):
+        return
+
+    await lock_tournament_standings(db, tournament_id)
+    await apply_team_delta(db, tournament_id, home_team_id, match_result_delta(home_team_score, guest_team_score), sign)
+    await apply_team_delta(db, tournament_id, guest_team_id, match_result_delta(guest_team_score, home_team_score), sign)
+
+
+async def apply_match_results(db: AsyncSession, tournament_id: int, match_results):
+    """
+    Applies several match result changes to the standings at once. match_results holds
+    (home_team_id, guest_team_id, home_team_score, guest_team_score, sign) tuples like the arguments
+    of apply_match_result. The deltas are summed per team, so every team's row is updated once.
+    """
+    team_deltas = defaultdict(Counter)
+    for home_team_id, guest_team_id, home_team_score, guest_team_score, sign in match_results:
+        if not is_match_played(home_team_score, guest_team_score):
+            continue
+        for football_team_id, delta in (
+            (home_team_id, match_result_delta(home_team_score, guest_team_score)),
+            (guest_team_id, match_result_delta(guest_team_score, home_team_score)),
+        ):
+            for field, value in delta.items():
+                team_deltas[football_team_id][field] += sign * value
+
+    if not team_deltas:
+        return
+    await lock_tournament_standings(db, tournament_id)
+    for football_team_id in sorted(team_deltas):
+        await apply_team_delta(db, tournament_id, football_team_id, team_deltas[football_team_id], 1)
+
+
+async def rebuild_tournament_standings(db: AsyncSession, tournament_id: int):
+    """
+    Recomputes the standings of a tournament from its enrolled teams and played matches.
+    """
+    # Taken before the aggregate is read, so it sees every match result committed by an earlier writer
+    await lock_tournament_standings(db, tournament_id)
+    teams_results = (await db.execute(TOURNAMENT_STANDINGS_SQL, {"tournament_id": tournament_id})).mappings().all()
+
+    await db.execute(delete(TournamentStanding).where(TournamentStanding.tournament_id == tournament_id))
+    if teams_results:
+        await db.execute(
+            insert(TournamentStanding),
+            [
+                {
+                    "tournament_id": tournament_id,
+                    "football_team_id": team_results["team_id"],
+                    "matches_played": team_results["matches_played"],
+                    "score": team_results["score"],
+                    "wins": team_results["wins"],
+                    "draws": team_results["draws"],
+                    "losses": team_results["losses"],
+                    "goals_scored": team_results["goals_scored"],
+                    "goals_conceded": team_results["goals_conceded"],
+                }
+                for team_results in teams_results
+            ]
+        )
+
+
+def select_standings():
+    """
+    Standings rows with team names, ordered by tournament and then by table position.
+    """
+    goal_difference = (TournamentStanding.goals_scored - TournamentStanding.goals_conceded).label("goal_difference")
+    return (
+        select(
+            TournamentStanding.tournament_id,
+            TournamentStanding.football_team_id,
+            FootballTeam.team_name,
+            TournamentStanding.matches_played,
+            TournamentStanding.score,
+            TournamentStanding.wins,
+            TournamentStanding.draws,
+            TournamentStanding.losses,
+            TournamentStanding.goals_scored,
+            TournamentStanding.goals_conceded,
+            goal_difference
+        )
+        .join(FootballTeam, FootballTeam.id == TournamentStanding.football_team_id)
+        .order_by(
+            TournamentStanding.tournament_id,
+            TournamentStanding.score.desc(),
+            goal_difference.desc(),
+            TournamentStanding.goals_scored.desc(),
+            FootballTeam.team_name
+        )
+    )
+
+
+async def get_tournament_standings(db: AsyncSession, tournament_id: int):
+    return (await db.execute(select_standings().where(TournamentStanding.tournament_id == tournament_id))).all()
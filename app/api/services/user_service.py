@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException, status
+from sqlalchemy import select, event
+
+from app.config import settings, SessionLocal
+from app.api.models.models import User
+from app.api.schemas.user import UserResponse
+from app.api.services.cache_service import MemoryCache
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in its own bounded thread pool so password hashing never occupies the event loop
+    or the threadpool of regular handlers. bcrypt releases the GIL, so threads scale across cores.
+    Requests beyond max_pending are rejected right away with 503 instead of queueing.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, rounds: int):
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    def _hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    @staticmethod
+    def _verify(password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self._verify, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # bcrypt hashes look like $2b$12$<salt+hash>, the second field is the cost factor
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def stats(self) -> dict:
+        return {"pending": self._pending, "max_pending": self.max_pending, "rounds": self.rounds}
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASHER_WORKERS,
+    max_pending=settings.PASSWORD_HASHER_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+# Snapshots of authenticated users, deactivation takes effect within AUTH_CACHE_TTL_SECONDS at most
+principal_cache = MemoryCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+async def load_principal(username: str) -> UserResponse | None:
+    async with SessionLocal() as db:
+        user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+        if user is None:
+            return None
+        return UserResponse(id=user.id, username=user.username, is_active=bool(user.is_active))
+
+
+async def get_principal(username: str) -> UserResponse | None:
+    principal = principal_cache.get(username)
+    if principal is None:
+        principal = await load_principal(username)
+        if principal is not None:
+            principal_cache.set(username, principal)
+    return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_principal(mapper, connection, user: User):
+    principal_cache.invalidate_key(user.username)
@@ -0,0 +1,63 @@
+from sqlalchemy import select, update, union, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models.models import FootballTeam, Tournament, Match, FootballTeamToTournament
+
+
+# Every tournament and team carries a version that write handlers bump inside their transaction.
+# GET endpoints derive their ETag from it, so a conditional request is answered with a single
+# version lookup. A team change bumps the tournaments that show the team as well.
+
+
+async def bump_tournament_versions(db: AsyncSession, tournament_ids):
+    """
+    tournament_ids may be an iterable of ids or a select of ids.
+    """
+    await db.execute(
+        update(Tournament)
+        .where(Tournament.id.in_(tournament_ids))
+        .values(version=Tournament.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def select_football_team_tournament_ids(football_team_ids):
+    """
+    Tournaments the teams are enrolled in or have matches in.
+    """
+    return union(
+        select(FootballTeamToTournament.tournament_id)
+        .where(FootballTeamToTournament.football_team_id.in_(football_team_ids)),
+        select(Match.tournament_id)
+        .where(or_(Match.home_team_id.in_(football_team_ids), Match.guest_team_id.in_(football_team_ids)))
+    )
+
+
+async def bump_football_team_versions(db: AsyncSession, football_team_ids):
+    """
+    Bumps the teams and the tournaments they appear in. Must run before the teams' rows are deleted.
+    """
+    football_team_ids = list(football_team_ids)
+    await db.execute(
+        update(FootballTeam)
+        .where(FootballTeam.id.in_(football_team_ids))
+        .values(version=FootballTeam.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await bump_tournament_versions(db, select_football_team_tournament_ids(football_team_ids))
+
+
+async def get_tournament_version(db: AsyncSession, tournament_id: int) -> int | None:
+    return (await db.execute(select(Tournament.version).where(Tournament.id == tournament_id))).scalar()
+
+
+async def get_football_team_version(db: AsyncSession, football_team_id: int) -> int | None:
+    return (await db.execute(select(FootballTeam.version).where(FootballTeam.id == football_team_id))).scalar()
+
+
+def tournament_etag(tournament_id: int, version: int) -> str:
+    return f'W/"tournament-{tournament_id}-{version}"'
+
+
+def football_team_etag(football_team_id: int, version: int) -> str:
+    return f'W/"football_team-{football_team_id}-{version}"'
@@ -0,0 +1,38 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+
+BLOB_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobStore:
+    """
+    Content-addressed files on disk, named by the sha256 of their content and spread over
+    subdirectories by the first two hex digits. Storing the same content twice is a no-op.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def exists(self, digest: str) -> bool:
+        return BLOB_HASH_PATTERN.fullmatch(digest) is not None and self.path(digest).is_file()
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, so readers never see a partial blob
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as blob_file:
+                blob_file.write(data)
+            os.replace(blob_file.name, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return self.path(digest).read_bytes()
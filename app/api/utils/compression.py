@@ -0,0 +1,110 @@
+import gzip
+import zlib
+
+# brotli and zstandard are optional, their encodings are simply not offered without them
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Media types worth compressing, anything else (images, archives) is sent as is
+COMPRESSIBLE_MEDIA_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+
+class GzipEncoder:
+    def compress(self, data: bytes, level: int) -> bytes:
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    def compressor(self, level: int):
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class BrotliEncoder:
+    def compress(self, data: bytes, level: int) -> bytes:
+        return brotli.compress(data, quality=level)
+
+    def compressor(self, level: int):
+        return BrotliCompressor(level)
+
+
+class ZstdEncoder:
+    def compress(self, data: bytes, level: int) -> bytes:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def compressor(self, level: int):
+        return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+def available_encoders() -> dict:
+    """
+    Encoders by content coding in the server's order of preference. A compressor returned by
+    encoder.compressor(level) has compress(chunk) and flush() like zlib's compression objects.
+    """
+    encoders = {}
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder()
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder()
+    encoders["gzip"] = GzipEncoder()
+    return encoders
+
+
+ENCODERS = available_encoders()
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """
+    Content codings of an Accept-Encoding header with their q-values.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str, encodings) -> str | None:
+    """
+    Picks the content coding the client prefers among encodings, ties go to the order of encodings.
+    Returns None when the client accepts none of them.
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    default_quality = accepted.get("*", 0.0)
+    best_encoding, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, default_quality)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
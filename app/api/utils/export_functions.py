@@ -0,0 +1,47 @@
+import csv
+import io
+from datetime import date, datetime
+
+import orjson
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def iter_ndjson_chunks(result):
+    """
+    Encodes a streamed result as newline delimited JSON, one chunk per fetched partition of rows.
+    """
+    async for rows in result.partitions():
+        yield b"".join(orjson.dumps(dict(row._mapping), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+async def iter_csv_chunks(result):
+    """
+    Encodes a streamed result as CSV with a header row, one chunk per fetched partition of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+
+    async for rows in result.partitions():
+        writer.writerows(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # A result without rows still yields its header
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORT_ENCODERS = {
+    "ndjson": iter_ndjson_chunks,
+    "csv": iter_csv_chunks,
+}
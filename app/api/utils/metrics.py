@@ -0,0 +1,76 @@
+import threading
+from bisect import bisect_left
+
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, memory does not grow with the number of observations.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.sum
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip((*map(str, self.buckets), "+Inf"), counts):
+            cumulative += bucket_count
+            buckets[bound] = cumulative
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+class PrometheusText:
+    """
+    Builds a page in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name: str, metric_type: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, value, labels: dict | None = None):
+        self.lines.append(f"{name}{format_labels(labels or {})} {value}")
+
+    def histogram(self, name: str, snapshot: dict, labels: dict | None = None):
+        labels = labels or {}
+        for bound, count in snapshot["buckets"].items():
+            self.sample(f"{name}_bucket", count, {**labels, "le": bound})
+        self.sample(f"{name}_sum", snapshot["sum"], labels)
+        self.sample(f"{name}_count", snapshot["count"], labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
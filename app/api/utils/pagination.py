@@ -0,0 +1,60 @@
+from fastapi import HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class ListingPage:
+    """
+    Query parameters of the /all listings: a keyset cursor on id, a page size and a field projection.
+    """
+
+    def __init__(
+        self,
+        after_id: int | None = Query(None, description=f"Return rows after this id, taken from the {NEXT_CURSOR_HEADER} header"),
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+        fields: str | None = Query(None, description="Comma separated fields to return, id is always included")
+    ):
+        self.after_id = after_id
+        self.limit = limit
+        self.fields = fields
+
+
+def select_listing_columns(columns: dict, fields: str | None) -> dict:
+    if fields is None:
+        return columns
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - columns.keys())
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {name: column for name, column in columns.items() if name == "id" or name in requested}
+
+
+async def read_listing_page(db: AsyncSession, columns: dict, from_clause, page: ListingPage) -> ORJSONResponse:
+    """
+    Selects one page of a listing ordered by id, with only the requested columns.
+    columns maps response fields to column expressions and must contain "id".
+    A full page carries the cursor of the next one in the X-Next-Cursor header.
+    """
+    selected_columns = select_listing_columns(columns, page.fields)
+    statement = (
+        select(*(column.label(name) for name, column in selected_columns.items()))
+        .select_from(from_clause)
+        .order_by(columns["id"])
+        .limit(page.limit)
+    )
+    if page.after_id is not None:
+        statement = statement.where(columns["id"] > page.after_id)
+
+    rows = [dict(row._mapping) for row in await db.execute(statement)]
+
+    headers = {}
+    if len(rows) == page.limit:
+        headers[NEXT_CURSOR_HEADER] = str(rows[-1]["id"])
+    return ORJSONResponse(content=rows, headers=headers)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from app.api.utils.metrics import Histogram
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkout_wait_seconds = Histogram()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connections_created = 0
+        self.connections_invalidated = 0
+        self._lock = threading.Lock()
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    QueuePool that records how long checkouts wait for a free connection and how often they time out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.increment("checkout_timeouts")
+            raise
+        finally:
+            self.metrics.checkout_wait_seconds.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_pool(engine):
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return
+
+    metrics = pool.metrics
+    event.listen(engine, "checkout", lambda *args: metrics.increment("checkouts"))
+    event.listen(engine, "connect", lambda *args: metrics.increment("connections_created"))
+    event.listen(engine, "invalidate", lambda *args: metrics.increment("connections_invalidated"))
+
+
+def get_pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update({
+            "checkouts": metrics.checkouts,
+            "checkout_timeouts": metrics.checkout_timeouts,
+            "connections_created": metrics.connections_created,
+            "connections_invalidated": metrics.connections_invalidated,
+            "checkout_wait_seconds": metrics.checkout_wait_seconds.snapshot(),
+        })
+    return stats
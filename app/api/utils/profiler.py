@@ -0,0 +1,90 @@
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+# Ids start with the UTC creation time, so sorting them orders profiles by age
+PROFILE_ID_PATTERN = re.compile(r"\d{8}T\d{6}\.\d{6}-[0-9a-f]{8}")
+
+
+def new_profile_id() -> str:
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S.%f}-{uuid.uuid4().hex[:8]}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread samples the stack of one thread at a fixed
+    interval. Stacks are counted in the collapsed format ("outer;inner count"), which
+    speedscope and flamegraph tools load directly.
+
+    With root_frame, only samples taken while root_frame is on the stack are counted, starting
+    at root_frame. On an event loop thread that keeps a coroutine's own work and leaves out
+    the other tasks the loop runs in between.
+    """
+
+    def __init__(self, thread_id: int, interval: float, root_frame=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_frame = root_frame
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.root_frame = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                if frame is self.root_frame:
+                    break
+                frame = frame.f_back
+            if self.root_frame is not None and frame is None:
+                # The thread is running something else
+                continue
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """
+    Profiles saved as files in a directory, only the newest max_profiles are kept.
+    """
+
+    def __init__(self, directory, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def path(self, profile_id: str) -> Path | None:
+        if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.collapsed"
+        return path if path.is_file() else None
+
+    def list(self) -> list[str]:
+        if not self.directory.is_dir():
+            return []
+        return sorted((path.stem for path in self.directory.glob("*.collapsed")), reverse=True)
+
+    def save(self, profile_id: str, profile: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.collapsed").write_text(profile)
+        for stale_profile_id in self.list()[self.max_profiles:]:
+            os.remove(self.directory / f"{stale_profile_id}.collapsed")
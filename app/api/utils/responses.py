@@ -0,0 +1,25 @@
+from functools import lru_cache
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+class ModelResponse(Response):
+    """
+    JSON response serialized by pydantic-core straight from already validated models.
+    Returning it from a handler skips FastAPI's validation of the return value against
+    response_model, which then only documents the schema.
+    """
+    media_type = "application/json"
+
+    def __init__(self, content, response_type, status_code: int = 200, headers=None):
+        self.response_type = response_type
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content) -> bytes:
+        return get_type_adapter(self.response_type).dump_json(content)
@@ -1,48 +1,151 @@
-def generate_schedule(team_names):
-    teams = list(team_names)
-    n = len(teams)
+from collections import Counter, defaultdict
+from array import array
 
-    has_bye = False
-    if n % 2 != 0:
-        teams.append("BYE")
-        n += 1
-        has_bye = True
 
-    schedule = []
+def round_robin_round(teams_count, round_index):
+    """
+    Returns a single round of the circle method as a flat array of team indexes:
+    [home_0, guest_0, home_1, guest_1, ...].
 
-    fixed_team = teams[0]
-    rotating_teams = teams[1:]
+    Team 0 stays fixed while the others rotate one position per round. For an odd number
+    of teams a virtual team with index teams_count sits out, its opponent rests that round.
+    """
+    slots = teams_count + teams_count % 2
+    rotating_count = slots - 1
 
-    for _ in range(n - 1):
-        current_round_matches = []
+    def rotating(position):
+        return 1 + (position - round_index) % rotating_count
 
-        match_fixed = (fixed_team, rotating_teams[-1])
-        current_round_matches.append(match_fixed)
+    pairs = array("l", (0, rotating(rotating_count - 1)))
+    for position in range((slots - 2) // 2):
+        pairs.append(rotating(position))
+        pairs.append(rotating(rotating_count - 2 - position))
 
-        for i in range((n - 2) // 2):
-            match_pair = (rotating_teams[i], rotating_teams[n - 2 - 1 - i])
-            current_round_matches.append(match_pair)
+    if slots != teams_count:
+        pairs = array("l", (
+            team
+            for home, guest in zip(pairs[0::2], pairs[1::2])
+            if home != teams_count and guest != teams_count
+            for team in (home, guest)
+        ))
+    return pairs
 
-        filtered_round = []
-        for home, away in current_round_matches:
-            if home != "BYE" and away != "BYE":
-                filtered_round.append((home, away))
 
-        if filtered_round:
-            schedule.append(filtered_round)
+def swap_sides(pairs):
+    swapped = array("l", pairs)
+    swapped[0::2] = pairs[1::2]
+    swapped[1::2] = pairs[0::2]
+    return swapped
 
-        last_rotating_team = rotating_teams.pop()
-        rotating_teams.insert(0, last_rotating_team)
 
-    final_schedule = []
+def iter_round_robin(teams_count, legs=2):
+    """
+    Lazily yields the rounds of an n-fold round robin as flat index arrays. Every round of
+    the single round robin is followed by its other legs with home and guest sides alternating.
+    Memory usage is O(teams_count) regardless of the number of legs.
+    """
+    if teams_count < 2:
+        return
 
-    for round_idx in range(len(schedule)):
-        home_round = schedule[round_idx]
-        away_round = []
-        for home_team, away_team in home_round:
-            away_round.append((away_team, home_team))
+    for round_index in range(teams_count + teams_count % 2 - 1):
+        pairs = round_robin_round(teams_count, round_index)
+        for leg in range(legs):
+            yield pairs if leg % 2 == 0 else swap_sides(pairs)
 
-        final_schedule.append(home_round)
-        final_schedule.append(away_round)
 
-    return final_schedule
+def generate_schedule(team_ids, legs=2):
+    """
+    Yields the rounds of the schedule as lists of (home_team_id, guest_team_id) tuples.
+    """
+    teams = list(team_ids)
+    for pairs in iter_round_robin(len(teams), legs):
+        yield [(teams[home], teams[guest]) for home, guest in zip(pairs[0::2], pairs[1::2])]
+
+
+def find_double_bookings(fixtures):
+    """
+    Returns the sorted (tour_number, team_id) pairs of teams that have more than one match
+    in a tour, fixtures being (tour_number, home_team_id, guest_team_id) tuples.
+    """
+    booked = set()
+    double_booked = set()
+    for tour_number, home_team_id, guest_team_id in fixtures:
+        for team_id in (home_team_id, guest_team_id):
+            if (tour_number, team_id) in booked:
+                double_booked.add((tour_number, team_id))
+            booked.add((tour_number, team_id))
+    return sorted(double_booked)
+
+
+def plan_reschedule(matches, schedule):
+    """
+    Plans the changes that bring the matches of a tournament in line with a generated schedule.
+
+    matches are the stored rows (id, tour_number, home_team_id, guest_team_id and both scores),
+    ordered by tour and id. The schedule only decides which fixtures are needed and with which
+    home team, a pair of teams meets as many times as it does in the schedule. Played matches
+    are never touched. Unplayed matches that are still needed keep their tour, the others are
+    deleted. Missing fixtures are placed in the first tour after the last played one where
+    neither team has a match yet, so the writes are proportional to the size of the change.
+
+    Returns (kept, moved, inserted, deleted_match_ids): the number of untouched matches,
+    (match_id, tour_number) of moved matches, (tour_number, home_team_id, guest_team_id)
+    of new matches and the ids of deleted matches.
+    """
+    scheduled = [fixture for tour_matches in schedule for fixture in tour_matches]
+    needed = defaultdict(list)
+    for fixture in scheduled:
+        needed[frozenset(fixture)].append(fixture)
+
+    def take_needed(home_team_id, guest_team_id):
+        fixtures = needed.get(frozenset((home_team_id, guest_team_id)))
+        if not fixtures:
+            return False
+        # Prefer the meeting with the same home team, any other meeting of the pair will do
+        if (home_team_id, guest_team_id) in fixtures:
+            fixtures.remove((home_team_id, guest_team_id))
+        else:
+            fixtures.pop(0)
+        return True
+
+    played = [match for match in matches if match.home_team_score is not None and match.guest_team_score is not None]
+    unplayed = [match for match in matches if match.home_team_score is None or match.guest_team_score is None]
+
+    busy = defaultdict(set)
+    for match in played:
+        take_needed(match.home_team_id, match.guest_team_id)
+        busy[match.tour_number].update((match.home_team_id, match.guest_team_id))
+
+    kept = len(played)
+    unplaced = []
+    deleted_match_ids = []
+    for match in unplayed:
+        if not take_needed(match.home_team_id, match.guest_team_id):
+            deleted_match_ids.append(match.id)
+        elif busy[match.tour_number].isdisjoint((match.home_team_id, match.guest_team_id)):
+            busy[match.tour_number].update((match.home_team_id, match.guest_team_id))
+            kept += 1
+        else:
+            unplaced.append((match.id, match.home_team_id, match.guest_team_id))
+
+    # Missing fixtures go in the order of the schedule, so the fixtures of a generated tour stay together
+    missing = Counter(fixture for fixtures in needed.values() for fixture in fixtures)
+    for home_team_id, guest_team_id in scheduled:
+        if missing[(home_team_id, guest_team_id)]:
+            missing[(home_team_id, guest_team_id)] -= 1
+            unplaced.append((None, home_team_id, guest_team_id))
+
+    first_open_tour = max((match.tour_number for match in played), default=0) + 1
+    moved = []
+    inserted = []
+    for match_id, home_team_id, guest_team_id in unplaced:
+        tour_number = first_open_tour
+        while not busy[tour_number].isdisjoint((home_team_id, guest_team_id)):
+            tour_number += 1
+        busy[tour_number].update((home_team_id, guest_team_id))
+        if match_id is None:
+            inserted.append((tour_number, home_team_id, guest_team_id))
+        else:
+            moved.append((match_id, tour_number))
+
+    return kept, moved, inserted, deleted_match_ids
@@ -0,0 +1,56 @@
+import asyncio
+
+
+class LeaderFailed(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the leader) runs the computation,
+    callers arriving while it is in flight (followers) wait for its result instead of running their own.
+    A follower waits at most max_wait_seconds and computes by itself when the leader is too slow or
+    cancelled. An exception raised by the leader's computation is raised to its followers as well.
+    """
+
+    def __init__(self, max_wait_seconds: float):
+        self.max_wait_seconds = max_wait_seconds
+        self.followers = 0
+        self.follower_timeouts = 0
+        self._flights = {}
+
+    async def do(self, key, compute):
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.followers += 1
+            # wait() leaves the flight running when a follower gives up or is cancelled
+            done, _ = await asyncio.wait({flight}, timeout=self.max_wait_seconds)
+            if not done:
+                self.follower_timeouts += 1
+                return await compute()
+            try:
+                return flight.result()
+            except LeaderFailed:
+                return await compute()
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            value = await compute()
+        except Exception as error:
+            flight.set_exception(error)
+            raise
+        except BaseException:
+            # Cancelled with its request, the followers are still waiting for a value
+            flight.set_exception(LeaderFailed())
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            del self._flights[key]
+            # Retrieve the outcome so an unawaited failure is not reported as never retrieved
+            flight.exception()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
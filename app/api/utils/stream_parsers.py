@@ -0,0 +1,158 @@
+import codecs
+import csv
+import json
+
+
+MAX_LINE_LENGTH = 1024 * 1024
+
+
+class OverlongLine:
+    """
+    Stands in for a line longer than the limit. The line is skipped up to the next newline
+    without being kept in memory, only the number of quotes in it is counted.
+    """
+    __slots__ = ("quotes_count",)
+
+    def __init__(self, quotes_count: int):
+        self.quotes_count = quotes_count
+
+
+async def iter_lines(chunks, max_line_length: int = MAX_LINE_LENGTH):
+    """
+    Splits a stream of UTF-8 byte chunks into text lines. Only the current incomplete line
+    is kept between chunks, so memory does not grow with the size of the stream.
+    Lines longer than max_line_length are yielded as OverlongLine.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    skipped_quotes_count = None
+    try:
+        async for chunk in chunks:
+            text = decoder.decode(chunk)
+            if skipped_quotes_count is not None:
+                line_end = text.find("\n")
+                if line_end == -1:
+                    skipped_quotes_count += text.count('"')
+                    continue
+                yield OverlongLine(skipped_quotes_count + text.count('"', 0, line_end))
+                skipped_quotes_count = None
+                text = text[line_end + 1:]
+
+            lines = (pending + text).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line if len(line) <= max_line_length else OverlongLine(line.count('"'))
+            if len(pending) > max_line_length:
+                skipped_quotes_count = pending.count('"')
+                pending = ""
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ValueError("Body is not valid UTF-8")
+
+    if skipped_quotes_count is not None:
+        yield OverlongLine(skipped_quotes_count + pending.count('"'))
+    elif pending:
+        yield pending
+
+
+async def iter_ndjson_records(chunks, max_line_length: int = MAX_LINE_LENGTH):
+    """
+    Yields (line number, record, error) for every non-empty line of a newline delimited JSON stream.
+    """
+    line_number = 0
+    try:
+        async for line in iter_lines(chunks, max_line_length):
+            line_number += 1
+            if isinstance(line, OverlongLine):
+                yield line_number, None, f"Line is longer than {max_line_length} characters"
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield line_number, None, f"Invalid JSON: {error}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+    except ValueError as error:
+        yield line_number + 1, None, str(error)
+
+
+async def iter_csv_records(chunks, max_line_length: int = MAX_LINE_LENGTH):
+    """
+    Yields (line number, record, error) for every row of a CSV stream with a header row.
+    A row may span several lines inside a quoted field. Empty values are left out of the record.
+    A row longer than max_line_length is reported and skipped, parsing goes on with the next row.
+    """
+    header = None
+    in_row = False
+    row_lines = []
+    row_length = 0
+    row_too_long = False
+    quotes_count = 0
+    line_number = first_line_number = 0
+    try:
+        async for line in iter_lines(chunks, max_line_length):
+            line_number += 1
+            if not in_row:
+                in_row = True
+                first_line_number = line_number
+
+            if isinstance(line, OverlongLine):
+                quotes_count += line.quotes_count
+                row_too_long = True
+            else:
+                quotes_count += line.count('"')
+                row_length += len(line)
+                row_too_long = row_too_long or row_length > max_line_length
+                if not row_too_long:
+                    row_lines.append(line)
+            if row_too_long:
+                row_lines = []
+
+            # An odd number of quotes means a quoted field continues on the next line
+            if quotes_count % 2:
+                continue
+
+            row = "\n".join(row_lines)
+            too_long = row_too_long
+            in_row = False
+            row_lines = []
+            row_length = quotes_count = 0
+            row_too_long = False
+
+            if too_long:
+                yield first_line_number, None, f"Row is longer than {max_line_length} characters"
+                continue
+            if not row.strip():
+                continue
+
+            try:
+                values = next(csv.reader([row]))
+            except csv.Error as error:
+                yield first_line_number, None, f"Invalid CSV: {error}"
+                continue
+
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield first_line_number, None, f"Expected {len(header)} values, got {len(values)}"
+                continue
+            yield first_line_number, {name: value for name, value in zip(header, values) if value != ""}, None
+    except ValueError as error:
+        yield line_number + 1, None, str(error)
+        return
+
+    if in_row:
+        yield first_line_number, None, "Unterminated quoted field"
+
+
+RECORD_PARSERS = {
+    "text/csv": iter_csv_records,
+    "application/x-ndjson": iter_ndjson_records,
+    "application/jsonl": iter_ndjson_records,
+}
@@ -1,11 +1,14 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import make_url, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from fastapi.security import OAuth2PasswordBearer
 import os
 
+from app.api.utils.pool_metrics import InstrumentedQueuePool, instrument_pool
+from app.middleware import instrument_statement_timing
+
 
 class Settings(BaseSettings):
     class Config:
@@ -18,10 +21,136 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
     CORS_ORIGINS: list[str] = Field(..., env="CORS_ORIGINS")
 
+    # Read replicas for GET endpoints, reads fall back to the primary when none is healthy
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    # A replica that does not answer its health check within this long is skipped until the next check
+    REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS: float = 1
+    # Replicas lagging behind the primary by more than this are skipped (PostgreSQL only), 0 disables the check
+    REPLICA_MAX_LAG_SECONDS: float = 0
+    # Reads of a client that has just written go to the primary for this long
+    REPLICA_READ_YOUR_WRITES_SECONDS: float = 5
+
+    # Connection pool, ignored for SQLite
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # PostgreSQL session timeouts in milliseconds, 0 disables them
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_LOCK_TIMEOUT_MS: int = 0
+
+    # Bearer token required by GET /metrics, the endpoint is open when unset
+    METRICS_TOKEN: str | None = None
+
+    # Per-request profiling, a request is profiled when its X-Profile header carries PROFILING_TOKEN
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str | None = None
+    PROFILING_DIR: str = "profiles"
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    PROFILING_MAX_PROFILES: int = 50
+
+    # Response compression, the codings a client accepts are preferred in the order zstd, br, gzip
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # Levels per route template and coding, e.g. {"/api/v1/export/matches": {"gzip": 1, "br": 1, "zstd": 1}}
+    COMPRESSION_ROUTE_LEVELS: dict[str, dict[str, int]] = {}
+    # Compressed bodies of responses with an ETag, kept per path, ETag and coding
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 128
+    COMPRESSION_CACHE_TTL_SECONDS: float = 300
+
+    # Page size of the /all listing endpoints
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+
+    # Matches deleted per transaction when a tournament is purged in the background
+    PURGE_BATCH_SIZE: int = 5000
+
+    # Content-addressed store of team logos
+    LOGO_STORAGE_DIR: str = "media/logos"
+    LOGO_MAX_BYTES: int = 1024 * 1024
+
+    # Read cache of schedule and standings endpoints ("memory" or "none")
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL_SECONDS: float = 300
+    # Concurrent misses of the same entry wait for the first one at most this long before querying themselves
+    CACHE_COALESCE_WAIT_SECONDS: float = 1
+
+    # Password hashing, runs in a dedicated thread pool
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASHER_WORKERS: int = 2
+    PASSWORD_HASHER_MAX_PENDING: int = 32
+
+    # Authenticated user snapshots, bounds how long a deactivated user keeps access
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 30
+
 
 settings = Settings()
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(database_url: str) -> str:
+    """
+    DATABASE_URL keeps the sync driver for Alembic, the application connects through the asyncio driver.
+    """
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
+def engine_options(database_url: str) -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    if settings.DB_LOCK_TIMEOUT_MS:
+        server_settings["lock_timeout"] = str(settings.DB_LOCK_TIMEOUT_MS)
+    if server_settings and url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"server_settings": server_settings}
+    return options
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # Deletes rely on ON DELETE CASCADE, which SQLite enforces only when asked to
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_database_engine(database_url: str):
+    database_engine = create_async_engine(async_database_url(database_url), **engine_options(database_url))
+    if database_engine.dialect.name == "sqlite":
+        event.listen(database_engine.sync_engine, "connect", enable_sqlite_foreign_keys)
+    instrument_pool(database_engine.sync_engine)
+    instrument_statement_timing(database_engine.sync_engine)
+    return database_engine
+
+
+engine = create_database_engine(settings.DATABASE_URL)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+replica_engines = [create_database_engine(replica_url) for replica_url in settings.DATABASE_REPLICA_URLS]
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 origins = settings.CORS_ORIGINS
@@ -1,14 +1,141 @@
+import asyncio
+import hashlib
+import itertools
+import time
+
+from fastapi import Request
+from sqlalchemy import event, text
 from sqlalchemy.orm import Session, declarative_base
 
-from app.config import engine, oauth2_scheme, settings, SessionLocal
+from app.config import engine, oauth2_scheme, settings, SessionLocal, replica_engines
 
 Base = declarative_base()
 # Base.metadata.create_all(engine)
 
+REPLICA_LAG_SQL = text("SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)")
+
+
+class ReplicaRouter:
+    """
+    Picks a replica engine round-robin among the healthy ones. A replica is re-checked at most once
+    per check interval: it must answer a query within check_timeout and, if max_lag_seconds is set,
+    not lag behind too much. Checks run in background tasks, one per replica at a time, so picking
+    a replica only reads the last known health and never waits for a replica.
+    """
+
+    def __init__(self, engines, check_interval: float, check_timeout: float, max_lag_seconds: float):
+        self.engines = list(engines)
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.max_lag_seconds = max_lag_seconds
+        self._health = {id(replica): (False, 0.0) for replica in self.engines}
+        self._checks = {}
+        self._order = itertools.cycle(self.engines)
+
+    async def _check(self, replica) -> bool:
+        try:
+            async with replica.connect() as connection:
+                if self.max_lag_seconds and replica.dialect.name == "postgresql":
+                    lag = (await connection.execute(REPLICA_LAG_SQL)).scalar()
+                    return float(lag) <= self.max_lag_seconds
+                await connection.execute(text("SELECT 1"))
+                return True
+        except Exception:
+            return False
+
+    async def _refresh(self, replica):
+        try:
+            healthy = await asyncio.wait_for(self._check(replica), timeout=self.check_timeout)
+        except asyncio.TimeoutError:
+            healthy = False
+        self._health[id(replica)] = (healthy, time.monotonic())
+
+    def is_healthy(self, replica) -> bool:
+        """
+        Returns the last known health of the replica and starts a background check when it is stale.
+        Replicas count as unhealthy until their first check has passed.
+        """
+        healthy, checked_at = self._health[id(replica)]
+        if time.monotonic() - checked_at >= self.check_interval and id(replica) not in self._checks:
+            check = asyncio.get_running_loop().create_task(self._refresh(replica))
+            self._checks[id(replica)] = check
+            check.add_done_callback(lambda _: self._checks.pop(id(replica), None))
+        return healthy
+
+    def pick(self):
+        for _ in range(len(self.engines)):
+            replica = next(self._order)
+            if self.is_healthy(replica):
+                return replica
+        return None
+
+    def stats(self) -> list[dict]:
+        return [
+            {"url": replica.url.render_as_string(hide_password=True), "healthy": self._health[id(replica)][0]}
+            for replica in self.engines
+        ]
+
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+    check_timeout=settings.REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+)
+
+# Clients that have just committed a write, their reads go to the primary until the entry expires
+recent_writers = {}
+
+
+@event.listens_for(Session, "after_commit")
+def mark_session_committed(session):
+    session.info["committed"] = True
+
+
+def client_key(request: Request) -> str | None:
+    authorization = request.headers.get("authorization")
+    if authorization is None:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+def remember_writer(request: Request):
+    key = client_key(request)
+    if key is None:
+        return
+    now = time.monotonic()
+    recent_writers[key] = now + settings.REPLICA_READ_YOUR_WRITES_SECONDS
+    if len(recent_writers) > 10000:
+        for stale_key in [writer for writer, expires_at in recent_writers.items() if expires_at < now]:
+            del recent_writers[stale_key]
+
+
+def reads_own_writes(request: Request) -> bool:
+    if request.headers.get("x-read-consistency") == "primary":
+        return True
+    key = client_key(request)
+    return key is not None and recent_writers.get(key, 0) > time.monotonic()
+
+
+async def get_db(request: Request):
+    async with SessionLocal() as db:
+        yield db
+        if db.info.get("committed") and replica_router.engines:
+            remember_writer(request)
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only endpoints, bound to a healthy replica when one is configured.
+    """
+    replica = None
+    if replica_router.engines and not reads_own_writes(request):
+        replica = replica_router.pick()
+
+    if replica is None:
+        async with SessionLocal() as db:
+            yield db
+        return
 
-def get_db():
-    db = SessionLocal()
-    try:
+    async with SessionLocal(bind=replica) as db:
         yield db
-    finally:
-        db.close()
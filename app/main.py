@@ -5,10 +5,14 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.database import Base
-from app.api.endpoints import users
-from app.api.endpoints.items import items_get, items_post, items_put, items_delete
+from app.api.endpoints import users, internal, metrics
+from app.api.endpoints.items import items_get, items_post, items_put, items_delete, items_export
 
-from app.config import origins
+from app.config import origins, settings
+from app.api.utils.pagination import NEXT_CURSOR_HEADER
+from app.middleware import TimingMiddleware, ProfilingMiddleware, CompressionMiddleware, PROFILE_ID_HEADER
+from app.api.services.profiling_service import profile_store
+from app.api.services.compression_service import compressed_responses, compression_levels
 
 # FastAPI App
 app = FastAPI()
@@ -19,7 +23,25 @@ app.add_middleware(
    allow_credentials=True,  # Important for cookies and sessions
    allow_methods=["*"],      # Allows all HTTP methods (GET, POST, PUT, DELETE, etc.)
    allow_headers=["*"],      # Allows all headers in the request
+   expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing", PROFILE_ID_HEADER],  # Lets browsers read the listing cursor and timings
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    levels=compression_levels,
+    route_levels=settings.COMPRESSION_ROUTE_LEVELS,
+    compressed_cache=compressed_responses,
+)
+if settings.PROFILING_ENABLED and settings.PROFILING_TOKEN:
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=settings.PROFILING_TOKEN,
+        profile_store=profile_store,
+        interval=settings.PROFILING_INTERVAL_SECONDS,
+        excluded_paths=("/api/v1/internal/profiles",),
+    )
+# Added last so it is the outermost middleware and times everything below it
+app.add_middleware(TimingMiddleware)
 
 # Include the Router in Main App
 app.include_router(users.router, prefix="/api/v1")
@@ -27,6 +49,9 @@ app.include_router(items_get.router, prefix="/api/v1")
 app.include_router(items_post.router, prefix="/api/v1")
 app.include_router(items_put.router, prefix="/api/v1")
 app.include_router(items_delete.router, prefix="/api/v1")
+app.include_router(items_export.router, prefix="/api/v1")
+app.include_router(internal.router, prefix="/api/v1")
+app.include_router(metrics.router)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,335 @@
+import secrets
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from app.api.utils.metrics import Histogram, STATEMENT_COUNT_BUCKETS, RESPONSE_SIZE_BUCKETS, PrometheusText
+from app.api.utils.profiler import SamplingProfiler, ProfileStore, new_profile_id
+from app.api.utils.compression import ENCODERS, is_compressible, negotiate_encoding
+
+
+# Label of requests that did not match any route, keeps the number of series bounded
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestTiming:
+    """
+    Database time and statement count of the request being handled.
+    """
+    __slots__ = ("db_seconds", "statements")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.statements = 0
+
+
+request_timing: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._request_timing_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = request_timing.get()
+    started = getattr(context, "_request_timing_started", None)
+    if timing is not None and started is not None:
+        timing.db_seconds += time.perf_counter() - started
+        timing.statements += 1
+
+
+def instrument_statement_timing(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration_seconds = Histogram()
+        self.db_seconds = Histogram()
+        self.statements = Histogram(STATEMENT_COUNT_BUCKETS)
+        self.response_bytes = Histogram(RESPONSE_SIZE_BUCKETS)
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def observe(self, status_code: int, duration: float, timing: RequestTiming, response_bytes: int):
+        self.duration_seconds.observe(duration)
+        self.db_seconds.observe(timing.db_seconds)
+        self.statements.observe(timing.statements)
+        self.response_bytes.observe(response_bytes)
+        with self._lock:
+            self.responses[status_code] = self.responses.get(status_code, 0) + 1
+
+
+class RequestMetrics:
+    """
+    Metrics of HTTP requests per (method, route template). The number of series is bounded
+    by the number of routes, since unmatched paths share a single label.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def route(self, method: str, path: str) -> RouteMetrics:
+        key = (method, path)
+        route_metrics = self.routes.get(key)
+        if route_metrics is None:
+            with self._lock:
+                route_metrics = self.routes.setdefault(key, RouteMetrics())
+        return route_metrics
+
+    def render(self, page: PrometheusText):
+        routes = sorted(self.routes.items())
+
+        page.metric("http_requests_total", "counter", "HTTP responses by route and status code.")
+        for (method, path), route_metrics in routes:
+            for status_code, count in sorted(route_metrics.responses.items()):
+                page.sample("http_requests_total", count, {"method": method, "route": path, "status": status_code})
+
+        for name, attribute, help_text in (
+            ("http_request_duration_seconds", "duration_seconds", "Wall time until the response is sent."),
+            ("http_request_db_seconds", "db_seconds", "Time spent executing SQL statements."),
+            ("http_request_db_statements", "statements", "SQL statements executed per request."),
+            ("http_response_size_bytes", "response_bytes", "Size of the response body."),
+        ):
+            page.metric(name, "histogram", help_text)
+            for (method, path), route_metrics in routes:
+                page.histogram(name, getattr(route_metrics, attribute).snapshot(), {"method": method, "route": path})
+
+
+request_metrics = RequestMetrics()
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that records wall time, database time, statement count and response size
+    of every HTTP request per route, and reports the request's own numbers in a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+        started = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_with_timing(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}, "
+                    f'db;dur={timing.db_seconds * 1000:.1f};desc="{timing.statements} statements"'
+                )
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timing.reset(token)
+            route = scope.get("route")
+            request_metrics.route(scope["method"], route.path if route is not None else UNMATCHED_ROUTE).observe(
+                status_code, time.perf_counter() - started, timing, response_bytes
+            )
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs the sampling profiler around requests whose X-Profile header
+    carries the profiling token, and saves the profile under the id returned in X-Profile-Id.
+    It is only installed when profiling is enabled, other requests pay a header lookup.
+
+    Only samples of the event loop thread taken while it runs the profiled request are kept, so
+    concurrent requests do not show up in its profile. Work the request hands to other tasks or to
+    the threadpool is not sampled either. Requests under excluded_paths, which read profiles with
+    the same header, are not profiled.
+    """
+
+    def __init__(self, app, token: str, profile_store: ProfileStore, interval: float, excluded_paths=()):
+        self.app = app
+        self.token = token.encode()
+        self.profile_store = profile_store
+        self.interval = interval
+        self.excluded_paths = tuple(excluded_paths)
+
+    def is_profiled(self, scope) -> bool:
+        if self.excluded_paths and scope["path"].startswith(self.excluded_paths):
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return secrets.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.is_profiled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        # Every frame of the request's own work runs below this one
+        profiler = SamplingProfiler(threading.get_ident(), self.interval, root_frame=sys._getframe())
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            await run_in_threadpool(self.profile_store.save, profile_id, profiler.collapsed())
+
+
+# Bodies at least this large are compressed in the threadpool, zlib, brotli and zstd release the GIL
+THREADPOOL_COMPRESSION_SIZE = 64 * 1024
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses with the content coding negotiated from Accept-Encoding.
+    Complete bodies smaller than minimum_size are sent as is, streamed bodies are compressed chunk by chunk.
+    Compressed bodies of GET responses with an ETag are kept in compressed_cache by path, ETag and coding,
+    so a hot payload is compressed once per version instead of on every request.
+    """
+
+    def __init__(self, app, minimum_size: int, levels: dict, route_levels: dict, compressed_cache):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels
+        self.route_levels = route_levels
+        self.compressed_cache = compressed_cache
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http" and scope["method"] != "HEAD":
+            accept_encoding = next((value for name, value in scope["headers"] if name == b"accept-encoding"), None)
+            if accept_encoding:
+                encoding = negotiate_encoding(accept_encoding.decode("latin-1"), ENCODERS)
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await CompressionResponder(self, scope, encoding, send).run(receive)
+
+    def level(self, scope, encoding: str) -> int:
+        route = scope.get("route")
+        route_levels = self.route_levels.get(route.path, {}) if route is not None else {}
+        return route_levels.get(encoding, self.levels[encoding])
+
+
+async def compress(compress_data, data: bytes) -> bytes:
+    if len(data) >= THREADPOOL_COMPRESSION_SIZE:
+        return await run_in_threadpool(compress_data, data)
+    return compress_data(data)
+
+
+class CompressionResponder:
+    """
+    Compression state of a single response. The start message is held back until the first
+    body message shows whether the response is compressed at all.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, scope, encoding: str, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.compressor = None
+
+    async def run(self, receive):
+        await self.middleware.app(self.scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+        elif message["type"] != "http.response.body":
+            await self.send_start()
+            await self.send(message)
+        elif self.start_message is not None:
+            await self.send_first_body(message)
+        elif self.compressor is not None:
+            body = await compress(self.compressor.compress, message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if not more_body:
+                body += self.compressor.flush()
+            if body or not more_body:
+                await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+        else:
+            await self.send(message)
+
+    async def send_start(self):
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
+
+    async def send_first_body(self, message):
+        headers = MutableHeaders(scope=self.start_message)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if (
+            self.start_message["status"] != 200
+            or "content-encoding" in headers
+            or not is_compressible(headers.get("content-type", ""))
+            or (not more_body and len(body) < self.middleware.minimum_size)
+        ):
+            await self.send_start()
+            await self.send(message)
+            return
+
+        encoder = ENCODERS[self.encoding]
+        level = self.middleware.level(self.scope, self.encoding)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The compressed body is not byte for byte the identity one, so a strong ETag becomes weak
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        if more_body:
+            del headers["Content-Length"]
+            self.compressor = encoder.compressor(level)
+            body = await compress(self.compressor.compress, body)
+        else:
+            body = await self.compress_body(encoder, level, etag, body)
+            headers["Content-Length"] = str(len(body))
+
+        await self.send_start()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def compress_body(self, encoder, level: int, etag: str | None, body: bytes) -> bytes:
+        if etag is None or self.scope["method"] != "GET":
+            return await compress(lambda data: encoder.compress(data, level), body)
+
+        key = (self.scope["path"], self.scope["query_string"], etag, self.encoding)
+        compressed = self.middleware.compressed_cache.get(key)
+        if compressed is None:
+            compressed = await compress(lambda data: encoder.compress(data, level), body)
+            self.middleware.compressed_cache.set(key, compressed)
+        return compressed
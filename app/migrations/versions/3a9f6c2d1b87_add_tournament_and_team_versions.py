@@ -0,0 +1,33 @@
+"""Add tournament and team versions
+
+Revision ID: 3a9f6c2d1b87
+Revises: e5b7d1c94a30
+Create Date: 2026-10-17 16:48:32.207415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9f6c2d1b87'
+down_revision: Union[str, Sequence[str], None] = 'e5b7d1c94a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant server default lets PostgreSQL add the column without rewriting the table
+    op.add_column('tournaments', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('football_teams', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('football_teams') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('tournaments') as batch_op:
+        batch_op.drop_column('version')
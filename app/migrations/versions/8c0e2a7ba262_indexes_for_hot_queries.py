@@ -0,0 +1,74 @@
+"""Indexes for hot queries
+
+Revision ID: 8c0e2a7ba262
+Revises: c14e8f3ada6d
+Create Date: 2026-10-17 14:02:47.519330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c0e2a7ba262'
+down_revision: Union[str, Sequence[str], None] = 'c14e8f3ada6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Plain indexes on primary keys, the primary key constraint already provides them
+PRIMARY_KEY_INDEXES = [
+    ('ix_tournament_types_id', 'tournament_types'),
+    ('ix_users_id', 'users'),
+    ('ix_players_id', 'players'),
+    ('ix_football_teams_id', 'football_teams'),
+    ('ix_tournaments_id', 'tournaments'),
+    ('ix_football_teams_to_tournaments_id', 'football_teams_to_tournaments'),
+    ('ix_matches_id', 'matches'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for index_name, table_name in PRIMARY_KEY_INDEXES:
+        op.drop_index(index_name, table_name=table_name)
+
+    # Matches of a tournament or of a single tour, replaces the plain tournament_id index
+    op.create_index('ix_matches_tournament_id_tour_number', 'matches', ['tournament_id', 'tour_number'], unique=False)
+    op.drop_index('ix_matches_tournament_id', table_name='matches')
+
+    # Played matches of a tournament, an index-only scan for the standings aggregate
+    op.create_index(
+        'ix_matches_tournament_id_played', 'matches', ['tournament_id'], unique=False,
+        postgresql_include=['home_team_id', 'guest_team_id', 'home_team_score', 'guest_team_score'],
+        postgresql_where=sa.text('home_team_score IS NOT NULL AND guest_team_score IS NOT NULL')
+    )
+
+    # A team can be enrolled in a tournament only once, drop the duplicates before enforcing it
+    op.execute("""
+        DELETE FROM football_teams_to_tournaments AS FTT
+        USING football_teams_to_tournaments AS DUPLICATE
+        WHERE FTT.tournament_id = DUPLICATE.tournament_id
+            AND FTT.football_team_id = DUPLICATE.football_team_id
+            AND FTT.id > DUPLICATE.id
+    """)
+    op.create_index(
+        'ux_football_teams_to_tournaments_tournament_team', 'football_teams_to_tournaments',
+        ['tournament_id', 'football_team_id'], unique=True,
+        postgresql_include=['id']
+    )
+    op.drop_index('ix_football_teams_to_tournaments_tournament_id', table_name='football_teams_to_tournaments')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_football_teams_to_tournaments_tournament_id', 'football_teams_to_tournaments', ['tournament_id'], unique=False)
+    op.drop_index('ux_football_teams_to_tournaments_tournament_team', table_name='football_teams_to_tournaments')
+    op.drop_index('ix_matches_tournament_id_played', table_name='matches')
+    op.create_index('ix_matches_tournament_id', 'matches', ['tournament_id'], unique=False)
+    op.drop_index('ix_matches_tournament_id_tour_number', table_name='matches')
+
+    for index_name, table_name in PRIMARY_KEY_INDEXES:
+        op.create_index(index_name, table_name, ['id'], unique=False)
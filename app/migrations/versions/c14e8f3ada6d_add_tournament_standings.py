@@ -0,0 +1,83 @@
+"""Add tournament standings
+
+Revision ID: c14e8f3ada6d
+Revises: c82a22de7bde
+Create Date: 2026-10-17 12:10:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c14e8f3ada6d'
+down_revision: Union[str, Sequence[str], None] = 'c82a22de7bde'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tournament_standings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tournament_id', sa.Integer(), nullable=False),
+    sa.Column('football_team_id', sa.Integer(), nullable=False),
+    sa.Column('matches_played', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('wins', sa.Integer(), nullable=False),
+    sa.Column('draws', sa.Integer(), nullable=False),
+    sa.Column('losses', sa.Integer(), nullable=False),
+    sa.Column('goals_scored', sa.Integer(), nullable=False),
+    sa.Column('goals_conceded', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['football_team_id'], ['football_teams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tournament_id'], ['tournaments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tournament_id', 'football_team_id', name='uq_tournament_standings_tournament_team')
+    )
+    op.create_index(op.f('ix_tournament_standings_football_team_id'), 'tournament_standings', ['football_team_id'], unique=False)
+
+    # Backfill standings of existing tournaments from their played matches
+    op.execute("""
+        INSERT INTO tournament_standings (
+            tournament_id, football_team_id, matches_played, score,
+            wins, draws, losses, goals_scored, goals_conceded
+        )
+        WITH team_results AS (
+            SELECT tournament_id, home_team_id AS team_id,
+                   home_team_score AS scored, guest_team_score AS conceded
+            FROM matches
+            WHERE home_team_score IS NOT NULL AND guest_team_score IS NOT NULL
+            UNION ALL
+            SELECT tournament_id, guest_team_id AS team_id,
+                   guest_team_score AS scored, home_team_score AS conceded
+            FROM matches
+            WHERE home_team_score IS NOT NULL AND guest_team_score IS NOT NULL
+        ),
+        tournament_teams AS (
+            SELECT DISTINCT tournament_id, football_team_id
+            FROM football_teams_to_tournaments
+            WHERE tournament_id IS NOT NULL AND football_team_id IS NOT NULL
+        )
+        SELECT
+            TT.tournament_id,
+            TT.football_team_id,
+            COUNT(TR.team_id),
+            COALESCE(SUM(CASE WHEN TR.scored > TR.conceded THEN 3 WHEN TR.scored = TR.conceded THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN TR.scored > TR.conceded THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN TR.scored = TR.conceded THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN TR.scored < TR.conceded THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(TR.scored), 0),
+            COALESCE(SUM(TR.conceded), 0)
+        FROM tournament_teams AS TT
+        LEFT JOIN team_results AS TR
+            ON TR.tournament_id = TT.tournament_id AND TR.team_id = TT.football_team_id
+        GROUP BY TT.tournament_id, TT.football_team_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tournament_standings_football_team_id'), table_name='tournament_standings')
+    op.drop_table('tournament_standings')
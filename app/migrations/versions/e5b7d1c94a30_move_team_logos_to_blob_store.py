@@ -0,0 +1,86 @@
+"""Move team logos to blob store
+
+Revision ID: e5b7d1c94a30
+Revises: 8c0e2a7ba262
+Create Date: 2026-10-17 15:21:08.664213
+
+"""
+import base64
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.api.services.logo_service import logo_store
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7d1c94a30'
+down_revision: Union[str, Sequence[str], None] = '8c0e2a7ba262'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 100
+
+
+def iter_team_logos(connection):
+    """
+    Yields (id, team_logo) of teams with a logo in batches by id, so logos are never all in memory.
+    """
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, team_logo FROM football_teams "
+                "WHERE id > :last_id AND team_logo IS NOT NULL AND team_logo <> '' "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE}
+        ).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def decode_inline_logo(team_logo: str) -> bytes:
+    # Values that are not base64 are kept byte for byte rather than dropped
+    if team_logo.startswith("data:"):
+        team_logo = team_logo.partition(",")[2]
+    try:
+        return base64.b64decode(team_logo, validate=True)
+    except ValueError:
+        return team_logo.encode("utf-8")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if context.is_offline_mode():
+        raise RuntimeError("Logos are moved to the blob store by Python code, run this migration online")
+
+    connection = op.get_bind()
+    update_logo = sa.text("UPDATE football_teams SET team_logo = :team_logo WHERE id = :id")
+    for team in iter_team_logos(connection):
+        connection.execute(update_logo, {"id": team.id, "team_logo": logo_store.put(decode_inline_logo(team.team_logo))})
+
+    connection.execute(sa.text("UPDATE football_teams SET team_logo = NULL WHERE team_logo = ''"))
+    with op.batch_alter_table('football_teams') as batch_op:
+        batch_op.alter_column('team_logo', existing_type=sa.Text(), type_=sa.String(length=64))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if context.is_offline_mode():
+        raise RuntimeError("Logos are read back from the blob store by Python code, run this migration online")
+
+    with op.batch_alter_table('football_teams') as batch_op:
+        batch_op.alter_column('team_logo', existing_type=sa.String(length=64), type_=sa.Text())
+
+    connection = op.get_bind()
+    update_logo = sa.text("UPDATE football_teams SET team_logo = :team_logo WHERE id = :id")
+    for team in iter_team_logos(connection):
+        connection.execute(update_logo, {
+            "id": team.id,
+            "team_logo": base64.b64encode(logo_store.get(team.team_logo)).decode("ascii"),
+        })
@@ -0,0 +1,6 @@
+import os
+
+# The application reads its settings on import, the benchmarks bring their own database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("CORS_ORIGINS", '["http://localhost"]')
@@ -0,0 +1,94 @@
+"""
+Serialization time of the largest read responses: FastAPI's default path (validation against
+response_model, jsonable_encoder and json.dumps) against ModelResponse.
+
+    python -m benchmarks.bench_responses [teams ...]
+
+No database is needed, the payloads are built in memory like the handlers build them from rows.
+"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.schemas.item import FootballTeamInfo, MatchFullInfo, FootballTeamTournamentStatistics
+from app.api.utils.responses import ModelResponse
+from app.api.utils.schedule_functions import generate_schedule
+
+
+TEAMS = [20, 60, 200]
+REPEATS = 5
+
+
+def schedule_payload(teams: int) -> list[MatchFullInfo]:
+    football_teams = {
+        team_id: FootballTeamInfo(
+            id=team_id, player_id=1, team_name=f"team {team_id}", team_code=f"T{team_id}",
+            team_logo="0" * 64, country="country", city="city", achievements="achievements"
+        )
+        for team_id in range(1, teams + 1)
+    }
+    return [
+        MatchFullInfo(
+            id=tour_number * teams + index, tournament_id=1, tour_number=tour_number, date=datetime(2026, 5, 1, 18),
+            home_team_info=football_teams[home_team_id], guest_team_info=football_teams[guest_team_id],
+            home_team_score=2 if tour_number < teams else None, guest_team_score=1 if tour_number < teams else None
+        )
+        for tour_number, tour_matches in enumerate(generate_schedule(list(football_teams), legs=2), start=1)
+        for index, (home_team_id, guest_team_id) in enumerate(tour_matches)
+    ]
+
+
+def standings_payload(teams: int) -> list[FootballTeamTournamentStatistics]:
+    return [
+        FootballTeamTournamentStatistics(
+            team_name=f"team {team_id}", team_logo="0" * 64, matches_played=38, score=60, wins=18,
+            draws=6, losses=14, goals_scored=50, goals_conceded=40, goal_difference=10
+        )
+        for team_id in range(1, teams + 1)
+    ]
+
+
+async def fastapi_body(field, content) -> bytes:
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def model_response_body(field, content) -> bytes:
+    return ModelResponse(content, field.type_).body
+
+
+async def best_milliseconds(render, field, content) -> tuple[float, bytes]:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        body = await render(field, content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), body
+
+
+async def main(teams_counts):
+    print(f"best of {REPEATS}")
+    print(f"{'payload':>10} {'teams':>6} {'items':>6} {'MiB':>5} | {'FastAPI ms':>10} {'ModelResponse ms':>16} {'speedup':>7}")
+    for name, payload, response_type in (
+        ("schedule", schedule_payload, List[MatchFullInfo]),
+        ("standings", standings_payload, List[FootballTeamTournamentStatistics]),
+    ):
+        # The same field FastAPI creates for a route's response_model
+        field = create_model_field(name="Response", type_=response_type, mode="serialization")
+        for teams in teams_counts:
+            content = payload(teams)
+            fastapi_ms, fastapi_bytes = await best_milliseconds(fastapi_body, field, content)
+            model_ms, model_bytes = await best_milliseconds(model_response_body, field, content)
+            assert json.loads(fastapi_bytes) == json.loads(model_bytes)
+            print(f"{name:>10} {teams:>6} {len(content):>6} {len(model_bytes) / 2 ** 20:>5.1f} | "
+                  f"{fastapi_ms:>10.2f} {model_ms:>16.2f} {fastapi_ms / model_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(teams) for teams in sys.argv[1:]] or TEAMS))
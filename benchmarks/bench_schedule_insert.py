@@ -0,0 +1,84 @@
+"""
+Time and peak Python memory of persisting a generated double round robin schedule, one ORM Match
+per fixture (the former create_tournament_schedule) against insert_schedule_matches.
+
+    python -m benchmarks.bench_schedule_insert [teams ...]
+
+Runs on the PostgreSQL server of BENCH_DATABASE_URL when it is set, on SQLite otherwise.
+Every run is rolled back, memory is measured with tracemalloc in a separate run from the timing.
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.database import benchmark_engine, seed_sql
+from app.api.models.models import Match
+from app.api.schemas.item import MatchInfo
+from app.api.services.schedule_service import insert_schedule_matches
+from app.api.utils.schedule_functions import generate_schedule
+
+
+TEAMS = [10, 50, 100, 200, 500]
+
+
+async def insert_orm_matches(db: AsyncSession, tournament_id: int, schedule) -> list[MatchInfo]:
+    matches = []
+    for tour_number, tour_matches in enumerate(schedule, start=1):
+        for home_team_id, guest_team_id in tour_matches:
+            match = Match(
+                tournament_id=tournament_id,
+                tour_number=tour_number,
+                home_team_id=home_team_id,
+                guest_team_id=guest_team_id
+            )
+            db.add(match)
+            matches.append(match)
+    await db.flush()
+    return [MatchInfo.model_validate(match) for match in matches]
+
+
+async def measure(engine, insert, teams: int) -> tuple[float, float]:
+    """
+    Seconds and peak MiB of inserting the schedule of a tournament of teams teams.
+    """
+    async with AsyncSession(engine) as db:
+        # The schedule is generated lazily, so it is built again for every run
+        schedule = generate_schedule(range(1, teams + 1), legs=2)
+        started = time.perf_counter()
+        matches = await insert(db, 1, schedule)
+        seconds = time.perf_counter() - started
+        await db.rollback()
+    assert len(matches) == teams * (teams - 1)
+
+    async with AsyncSession(engine) as db:
+        schedule = generate_schedule(range(1, teams + 1), legs=2)
+        tracemalloc.start()
+        matches = await insert(db, 1, schedule)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        await db.rollback()
+    assert len(matches) == teams * (teams - 1)
+    return seconds, peak / 2 ** 20
+
+
+async def main(teams_counts):
+    async with benchmark_engine() as engine:
+        async with engine.begin() as setup:
+            for statement in seed_sql(tournaments=1, teams_per_tournament=max(teams_counts), played=False):
+                await setup.execute(text(statement))
+
+        print(f"{engine.dialect.name}, double round robin, every insert rolled back")
+        print(f"{'teams':>6} {'matches':>8} | {'ORM s':>8} {'ORM MiB':>8} | {'batched s':>9} {'batched MiB':>11}")
+        for teams in teams_counts:
+            orm_seconds, orm_peak = await measure(engine, insert_orm_matches, teams)
+            batched_seconds, batched_peak = await measure(engine, insert_schedule_matches, teams)
+            print(f"{teams:>6} {teams * (teams - 1):>8} | {orm_seconds:>8.3f} {orm_peak:>8.1f} | "
+                  f"{batched_seconds:>9.3f} {batched_peak:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(teams) for teams in sys.argv[1:]] or TEAMS))
@@ -0,0 +1,106 @@
+"""
+Planning time and latency of the standings aggregate with the tournament id formatted into the
+statement text (the former TOURNAMENT_STANDINGS_SQL(tournament_id)) against the bound-parameter
+TOURNAMENT_STANDINGS_SQL.
+
+    python -m benchmarks.bench_standings_query [executions]
+
+Needs PostgreSQL, set BENCH_DATABASE_URL. The statements run through the application's asyncpg driver,
+which prepares every distinct statement text and keeps the last 100 per connection.
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from benchmarks.database import benchmark_engine, seed_sql
+from app.api.repositories.tournament_queries import TOURNAMENT_STANDINGS_SQL
+
+
+TOURNAMENTS = 500
+TEAMS_PER_TOURNAMENT = 20
+EXECUTIONS = 2000
+# A prepared statement switches to a generic plan after five custom plans
+PREPARED_WARMUP = 6
+
+
+def literal_standings_sql(tournament_id: int):
+    return text(TOURNAMENT_STANDINGS_SQL.text.replace(":tournament_id", str(int(tournament_id))))
+
+
+def percentile(samples, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+async def planning_times(connection, tournament_ids) -> tuple[list[float], list[float]]:
+    """
+    Planning milliseconds of every execution, literal statements against one prepared statement.
+    """
+    literal, prepared = [], []
+    for tournament_id in tournament_ids:
+        sql = literal_standings_sql(tournament_id).text
+        plan = (await connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"))).scalar()
+        literal.append(plan[0]["Planning Time"])
+
+    prepared_sql = TOURNAMENT_STANDINGS_SQL.text.replace(":tournament_id", "$1").rstrip().rstrip(";")
+    await connection.execute(text(f"PREPARE standings (integer) AS {prepared_sql}"))
+    for tournament_id in tournament_ids[:PREPARED_WARMUP]:
+        await connection.execute(text(f"EXECUTE standings ({tournament_id})"))
+    for tournament_id in tournament_ids:
+        plan = (await connection.execute(
+            text(f"EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE standings ({tournament_id})")
+        )).scalar()
+        prepared.append(plan[0]["Planning Time"])
+    await connection.execute(text("DEALLOCATE standings"))
+    return literal, prepared
+
+
+async def latencies(connection, statement_for, tournament_ids) -> list[float]:
+    samples = []
+    for tournament_id in tournament_ids:
+        statement, parameters = statement_for(tournament_id)
+        started = time.perf_counter()
+        (await connection.execute(statement, parameters)).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main(executions: int):
+    async with benchmark_engine(require_postgresql=True) as engine:
+        async with engine.begin() as setup:
+            for statement in seed_sql(TOURNAMENTS, TEAMS_PER_TOURNAMENT):
+                await setup.execute(text(statement))
+        async with engine.connect() as connection:
+            await (await connection.execution_options(isolation_level="AUTOCOMMIT")).execute(text("ANALYZE"))
+
+        random.seed(3)
+        tournament_ids = [random.randint(1, TOURNAMENTS) for _ in range(executions)]
+        statements = {
+            "literal": lambda tournament_id: (literal_standings_sql(tournament_id), {}),
+            "bound": lambda tournament_id: (TOURNAMENT_STANDINGS_SQL, {"tournament_id": tournament_id}),
+        }
+
+        async with engine.connect() as connection:
+            literal_planning, prepared_planning = await planning_times(connection, tournament_ids[:200])
+            results = {}
+            for name, statement_for in statements.items():
+                # Warm the connection's caches on ids that are not measured
+                await latencies(connection, statement_for, random.sample(range(1, TOURNAMENTS + 1), 100))
+                results[name] = await latencies(connection, statement_for, tournament_ids)
+
+        print(f"{TOURNAMENTS} tournaments of {TEAMS_PER_TOURNAMENT} teams, "
+              f"{TOURNAMENTS * TEAMS_PER_TOURNAMENT * (TEAMS_PER_TOURNAMENT - 1)} matches")
+        print(f"planning ms, mean of {len(literal_planning)}: literal {statistics.mean(literal_planning):.3f}, "
+              f"prepared {statistics.mean(prepared_planning):.3f}")
+        print(f"{'statement':>9} | {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} over {executions} executions")
+        for name, samples in results.items():
+            print(f"{name:>9} | {percentile(samples, 0.5):>7.3f} {percentile(samples, 0.9):>7.3f} "
+                  f"{percentile(samples, 0.99):>7.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else EXECUTIONS))
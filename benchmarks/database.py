@@ -0,0 +1,94 @@
+import os
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.models import models  # registers the tables on Base.metadata
+from app.database import Base
+
+
+def postgresql_url() -> str | None:
+    for database_url in (os.environ.get("BENCH_DATABASE_URL"), os.environ.get("TEST_DATABASE_URL")):
+        if database_url and make_url(database_url).get_backend_name() == "postgresql":
+            return database_url
+    return None
+
+
+@asynccontextmanager
+async def benchmark_engine(require_postgresql: bool = False):
+    """
+    Async engine on a throwaway schema with the application's tables. The schema is created on the
+    PostgreSQL server of BENCH_DATABASE_URL (or TEST_DATABASE_URL), in a temporary SQLite file otherwise.
+    """
+    database_url = postgresql_url()
+    if database_url is None:
+        if require_postgresql:
+            raise SystemExit("This benchmark needs PostgreSQL, set BENCH_DATABASE_URL")
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/benchmark.db")
+            try:
+                async with engine.begin() as setup:
+                    await setup.run_sync(Base.metadata.create_all)
+                yield engine
+            finally:
+                await engine.dispose()
+        return
+
+    url = make_url(database_url).set(drivername="postgresql+asyncpg")
+    schema = f"benchmark_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(url)
+    async with admin.begin() as setup:
+        await setup.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_async_engine(url, connect_args={"server_settings": {"search_path": schema}})
+    try:
+        async with engine.begin() as setup:
+            await setup.run_sync(Base.metadata.create_all)
+        yield engine
+    finally:
+        await engine.dispose()
+        async with admin.begin() as teardown:
+            await teardown.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await admin.dispose()
+
+
+def seed_sql(tournaments: int, teams_per_tournament: int, played: bool = True) -> list[str]:
+    """
+    Tournaments of teams_per_tournament enrolled teams. With played, every tournament has a double
+    round robin of matches with the first half of the tours played.
+    """
+    tours = 2 * (teams_per_tournament - 1)
+    statements = [
+        "INSERT INTO users (id, username, hashed_password, is_active) VALUES (1, 'benchmark', '', true)",
+        "INSERT INTO players (id, user_id) VALUES (1, 1)",
+        "INSERT INTO tournament_types (id, tournament_type_name) VALUES (1, 'league')",
+        f"""
+        WITH RECURSIVE t(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM t WHERE n < {tournaments})
+        INSERT INTO tournaments (id, player_id, tournament_type_id, tournament_name, version)
+        SELECT n, 1, 1, 'tournament ' || n, 1 FROM t
+        """,
+        f"""
+        WITH RECURSIVE f(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM f WHERE n < {tournaments * teams_per_tournament})
+        INSERT INTO football_teams (id, player_id, team_name, version)
+        SELECT n, 1, 'team ' || n, 1 FROM f
+        """,
+        f"""
+        INSERT INTO football_teams_to_tournaments (tournament_id, football_team_id)
+        SELECT (id - 1) / {teams_per_tournament} + 1, id FROM football_teams
+        """,
+    ]
+    if played:
+        statements.append(f"""
+        INSERT INTO matches (tournament_id, tour_number, home_team_id, guest_team_id, home_team_score, guest_team_score)
+        SELECT
+            h.tournament_id, 1 + (h.football_team_id + g.football_team_id) % {tours},
+            h.football_team_id, g.football_team_id,
+            CASE WHEN (h.football_team_id + g.football_team_id) % {tours} < {tours // 2} THEN h.football_team_id % 4 END,
+            CASE WHEN (h.football_team_id + g.football_team_id) % {tours} < {tours // 2} THEN g.football_team_id % 3 END
+        FROM football_teams_to_tournaments AS h
+        JOIN football_teams_to_tournaments AS g
+            ON g.tournament_id = h.tournament_id AND g.football_team_id <> h.football_team_id
+        """)
+    return statements
@@ -0,0 +1,6 @@
+import os
+
+# The application reads its settings on import, tests that need no database get placeholders
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("CORS_ORIGINS", '["http://localhost"]')
@@ -0,0 +1,55 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, make_url, text
+
+from app.database import Base
+
+
+def postgresql_url() -> str | None:
+    for database_url in (os.environ.get("TEST_DATABASE_URL"), os.environ.get("DATABASE_URL")):
+        if database_url and make_url(database_url).get_backend_name() == "postgresql":
+            return database_url
+    return None
+
+
+requires_postgresql = pytest.mark.skipif(
+    postgresql_url() is None,
+    reason="this test needs PostgreSQL, set TEST_DATABASE_URL"
+)
+
+
+@contextmanager
+def throwaway_schema(prefix: str, seed_sql=()):
+    """
+    Creates a schema with the application's tables, runs seed_sql in it and yields the schema name.
+    The schema is dropped afterwards.
+    """
+    url = make_url(postgresql_url()).set(drivername="postgresql+psycopg2")
+    schema = f"{prefix}_{uuid.uuid4().hex[:8]}"
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+
+    with engine.begin() as setup:
+        setup.execute(text(f"CREATE SCHEMA {schema}"))
+    try:
+        with engine.begin() as setup:
+            Base.metadata.create_all(setup)
+            for statement in seed_sql:
+                setup.execute(text(statement))
+        yield schema
+    finally:
+        with engine.begin() as teardown:
+            teardown.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
+
+
+def schema_url(schema: str, drivername: str) -> tuple[str, dict]:
+    """
+    URL and connect_args of a connection to the schema through the given driver.
+    """
+    url = make_url(postgresql_url()).set(drivername=drivername)
+    if drivername == "postgresql+asyncpg":
+        return url, {"server_settings": {"search_path": schema}}
+    return url, {"options": f"-csearch_path={schema}"}
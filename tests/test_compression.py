@@ -0,0 +1,202 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.api.services.cache_service import MemoryCache
+from app.api.utils.compression import ENCODERS, negotiate_encoding, parse_accept_encoding
+from app.middleware import CompressionMiddleware
+
+
+ENCODINGS = ("zstd", "br", "gzip")
+
+
+@pytest.mark.parametrize("accept_encoding, encoding", [
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip, br", "br"),
+    ("gzip, br, zstd", "zstd"),
+    # q-values take precedence over the server's order
+    ("gzip;q=1.0, br;q=0.5, zstd;q=0.1", "gzip"),
+    ("br;q=0.8, gzip;q=0.9", "gzip"),
+    ("br; q=0.8 , gzip ; q=0.8", "br"),
+    # q=0 refuses a coding
+    ("gzip;q=0", None),
+    ("gzip;q=0, br", "br"),
+    ("gzip;q=0.000", None),
+    ("gzip;q=invalid", None),
+    # identity is never compressed
+    ("identity", None),
+    ("identity;q=1, gzip;q=0", None),
+    # * stands for every coding that is not listed
+    ("*", "zstd"),
+    ("*;q=0.5, gzip", "gzip"),
+    ("*, zstd;q=0", "br"),
+    ("*;q=0", None),
+    ("deflate, compress", None),
+    ("", None),
+    (" , ;q=1", None),
+])
+def test_negotiate_encoding(accept_encoding, encoding):
+    assert negotiate_encoding(accept_encoding, ENCODINGS) == encoding
+
+
+def test_negotiate_encoding_offers_only_available_encodings():
+    assert negotiate_encoding("zstd, br, gzip;q=0.1", ("gzip",)) == "gzip"
+    assert negotiate_encoding("zstd", ("gzip",)) is None
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, *;q=0") == {"gzip": 0.5, "br": 1.0, "*": 0.0}
+
+
+MINIMUM_SIZE = 100
+BODY = b'{"matches": [' + b", ".join(b'{"id": %d, "tour_number": 1}' % i for i in range(200)) + b"]}"
+SMALL_BODY = b'{"id": 1}'
+
+
+def json_response(body: bytes, status_code: int = 200, headers=None):
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+async def large(request):
+    return json_response(BODY)
+
+
+async def small(request):
+    return json_response(SMALL_BODY)
+
+
+async def not_found(request):
+    return json_response(BODY, status_code=404)
+
+
+async def image(request):
+    return Response(BODY, media_type="image/png")
+
+
+async def already_encoded(request):
+    return json_response(gzip.compress(BODY), headers={"Content-Encoding": "gzip"})
+
+
+async def tagged(request):
+    return json_response(BODY, headers={"ETag": request.query_params["etag"]})
+
+
+async def streamed(request):
+    async def chunks():
+        for start in range(0, len(BODY), 64):
+            yield BODY[start:start + 64]
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+def make_client():
+    app = Starlette(routes=[
+        Route("/large", large),
+        Route("/small", small),
+        Route("/not_found", not_found),
+        Route("/image", image),
+        Route("/already_encoded", already_encoded),
+        Route("/tagged", tagged),
+        Route("/streamed", streamed),
+    ])
+    compressed_cache = MemoryCache(max_entries=16, ttl_seconds=60)
+    app = CompressionMiddleware(
+        app, minimum_size=MINIMUM_SIZE, levels={"gzip": 6, "br": 4, "zstd": 3},
+        route_levels={}, compressed_cache=compressed_cache
+    )
+    return TestClient(app), compressed_cache
+
+
+def get(client, path, accept_encoding="gzip", method="GET"):
+    # The client would decode the body itself, read it raw to see what went over the wire
+    with client.stream(method, path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_large_response_is_compressed():
+    client, _ = make_client()
+    response, body = get(client, "/large")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body) < len(BODY)
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize("path", ["/small", "/not_found", "/image"])
+def test_response_is_sent_as_is(path):
+    client, _ = make_client()
+    response, body = get(client, path)
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert body in (BODY, SMALL_BODY)
+
+
+def test_encoded_response_is_not_compressed_again():
+    client, _ = make_client()
+    response, body = get(client, "/already_encoded")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip;q=0", ""])
+def test_response_is_not_compressed_without_accepted_coding(accept_encoding):
+    client, _ = make_client()
+    response, body = get(client, "/large", accept_encoding)
+    assert "content-encoding" not in response.headers
+    assert body == BODY
+
+
+def test_head_response_is_not_compressed():
+    client, _ = make_client()
+    response, _ = get(client, "/large", method="HEAD")
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_response_is_compressed_chunk_by_chunk():
+    client, _ = make_client()
+    response, body = get(client, "/streamed")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize("etag, compressed_etag", [
+    ('"tournament-1-3"', 'W/"tournament-1-3"'),
+    ('W/"tournament-1-3"', 'W/"tournament-1-3"'),
+])
+def test_etag_of_compressed_response_is_weak(etag, compressed_etag):
+    client, _ = make_client()
+    response, _ = get(client, f"/tagged?etag={etag}")
+    assert response.headers["etag"] == compressed_etag
+
+
+def test_compressed_body_is_cached_by_etag():
+    client, compressed_cache = make_client()
+
+    first, first_body = get(client, '/tagged?etag="v1"')
+    second, second_body = get(client, '/tagged?etag="v1"')
+    assert compressed_cache.hits == 1 and compressed_cache.size() == 1
+    assert first_body == second_body and gzip.decompress(second_body) == BODY
+
+    # Another version is compressed again
+    get(client, '/tagged?etag="v2"')
+    assert compressed_cache.hits == 1 and compressed_cache.size() == 2
+
+    # Responses without an ETag are never cached
+    get(client, "/large")
+    assert compressed_cache.size() == 2
+
+
+@pytest.mark.skipif("br" not in ENCODERS, reason="brotli is not installed")
+def test_compressed_body_is_cached_per_coding():
+    client, compressed_cache = make_client()
+    gzip_response, _ = get(client, '/tagged?etag="v1"', accept_encoding="gzip")
+    brotli_response, _ = get(client, '/tagged?etag="v1"', accept_encoding="br")
+    assert (gzip_response.headers["content-encoding"], brotli_response.headers["content-encoding"]) == ("gzip", "br")
+    assert compressed_cache.hits == 0 and compressed_cache.size() == 2
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from starlette.requests import Request
+
+from app.api.endpoints.items.items_get import tournament_versioned_response
+from app.api.services.cache_service import cache, tournament_tag
+from app.api.services.version_service import bump_tournament_versions
+from app.api.utils.etags import etag_matches
+from app.database import Base
+
+
+@pytest.mark.parametrize("if_none_match, etag, matches", [
+    (None, '"a"', False),
+    ("", '"a"', False),
+    ("*", '"a"', True),
+    (" * ", 'W/"a"', True),
+    ('"a"', '"a"', True),
+    ('"a"', '"b"', False),
+    # Weak comparison: the W/ prefix is ignored on either side
+    ('W/"a"', '"a"', True),
+    ('"a"', 'W/"a"', True),
+    ('W/"a"', 'W/"a"', True),
+    ('W/"a"', 'W/"b"', False),
+    ('"x", "a"', '"a"', True),
+    ('"x",W/"a" ,"y"', 'W/"a"', True),
+    ('"x", "y"', '"a"', False),
+    ('"a', '"a"', False),
+])
+def test_etag_matches(if_none_match, etag, matches):
+    assert etag_matches(if_none_match, etag) is matches
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_conditional_read_is_answered_from_cache_and_changes_after_write(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'etags.db'}")
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        computed = []
+
+        async def compute():
+            computed.append(1)
+            return [len(computed)]
+
+        async def read(if_none_match=None):
+            async with AsyncSession(engine) as db:
+                return await tournament_versioned_response(
+                    make_request(if_none_match), db, 1, ("etags test", 1), compute, [tournament_tag(1)], List[int]
+                )
+
+        try:
+            async with engine.begin() as setup:
+                await setup.run_sync(Base.metadata.create_all)
+                await setup.execute(text("INSERT INTO tournaments (id, tournament_name, version) VALUES (1, 't', 1)"))
+            cache.clear()
+
+            response = await read()
+            etag = response.headers["etag"]
+            assert (response.status_code, etag, json.loads(response.body)) == (200, 'W/"tournament-1-1"', [1])
+
+            # A cached read runs no statement, conditional or not
+            statements.clear()
+            assert (await read(etag)).status_code == 304
+            assert (await read('"other", ' + etag.removeprefix("W/"))).status_code == 304
+            assert (await read('"other"')).status_code == 200
+            assert (await read("*")).status_code == 304
+            assert statements == [] and computed == [1]
+
+            async with AsyncSession(engine) as db:
+                await bump_tournament_versions(db, [1])
+                await db.commit()
+            cache.invalidate_tags(tournament_tag(1))
+
+            response = await read(etag)
+            assert (response.status_code, response.headers["etag"], json.loads(response.body)) == \
+                (200, 'W/"tournament-1-2"', [2])
+            assert (await read(response.headers["etag"])).status_code == 304
+        finally:
+            cache.clear()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_write_during_compute_is_not_cached_under_the_old_version(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'etags.db'}")
+        computed = []
+
+        async def compute():
+            computed.append(1)
+            if len(computed) == 1:
+                async with AsyncSession(engine) as writer:
+                    await bump_tournament_versions(writer, [1])
+                    await writer.commit()
+            return [len(computed)]
+
+        try:
+            async with engine.begin() as setup:
+                await setup.run_sync(Base.metadata.create_all)
+                await setup.execute(text("INSERT INTO tournaments (id, tournament_name, version) VALUES (1, 't', 1)"))
+            cache.clear()
+
+            async with AsyncSession(engine) as db:
+                response = await tournament_versioned_response(
+                    make_request(), db, 1, ("etags test", 1), compute, [tournament_tag(1)], List[int]
+                )
+            assert (response.headers["etag"], json.loads(response.body)) == ('W/"tournament-1-2"', [2])
+        finally:
+            cache.clear()
+            await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import false, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.api.endpoints.items.items_post import add_football_team_to_tournament
+from app.api.models.models import FootballTeamToTournament
+from app.api.schemas.item import FootballTeamToTournamentCreate
+from app.database import Base
+
+
+def test_team_added_concurrently_is_reported_as_already_added(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'teams.db'}")
+        try:
+            async with engine.begin() as setup:
+                await setup.run_sync(Base.metadata.create_all)
+                await setup.execute(text("INSERT INTO tournaments (id, tournament_name) VALUES (1, 't')"))
+                await setup.execute(text("INSERT INTO football_teams (id, team_name) VALUES (1, 'team')"))
+                await setup.execute(text(
+                    "INSERT INTO football_teams_to_tournaments (football_team_id, tournament_id) VALUES (1, 1)"
+                ))
+
+            async with AsyncSession(engine) as db:
+                execute = db.execute
+
+                async def execute_before_concurrent_insert(statement, *args, **kwargs):
+                    # The duplicate check runs before the other request's row is committed
+                    db.execute = execute
+                    return await execute(statement.where(false()), *args, **kwargs)
+
+                db.execute = execute_before_concurrent_insert
+                with pytest.raises(HTTPException) as error:
+                    await add_football_team_to_tournament(
+                        FootballTeamToTournamentCreate(football_team_id=1, tournament_id=1), db, None
+                    )
+
+                # The session is usable again after the failed insert
+                mappings = (await db.execute(select(func.count()).select_from(FootballTeamToTournament))).scalar()
+                return error.value, mappings
+        finally:
+            await engine.dispose()
+
+    error, mappings = asyncio.run(run())
+    assert (error.status_code, error.detail) == (400, "Football team is already added to this tournament")
+    assert mappings == 1
@@ -0,0 +1,52 @@
+import asyncio
+import base64
+import threading
+
+import pytest
+
+from app.api.services import logo_service
+from app.api.services.logo_service import decode_logo, find_logo, logo_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 16
+
+
+def test_raster_logo_is_accepted():
+    assert decode_logo(base64.b64encode(PNG).decode()) == PNG
+    assert decode_logo("data:image/png;base64," + base64.b64encode(PNG).decode()) == PNG
+
+
+@pytest.mark.parametrize("logo", [
+    b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>',
+    b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"/>',
+    b"<html><script>alert(1)</script></html>",
+    b"logo",
+])
+def test_non_raster_logo_is_rejected(logo):
+    with pytest.raises(ValueError, match="PNG, JPEG, GIF or WebP"):
+        decode_logo(base64.b64encode(logo).decode())
+
+
+def test_stored_logo_media_type(tmp_path, monkeypatch):
+    monkeypatch.setattr(logo_store, "root", tmp_path)
+    png_hash = logo_store.put(PNG)
+    # Stored before uploads were checked
+    legacy_hash = logo_store.put(b"<svg/>")
+
+    assert asyncio.run(find_logo(png_hash)) == "image/png"
+    assert asyncio.run(find_logo(legacy_hash)) == "application/octet-stream"
+    assert asyncio.run(find_logo("0" * 64)) is None
+    assert asyncio.run(find_logo("../" + png_hash)) is None
+
+
+def test_logo_is_looked_up_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(logo_store, "root", tmp_path)
+    lookup_threads = []
+    logo_media_type = logo_service.logo_media_type
+
+    def recording_logo_media_type(logo_hash):
+        lookup_threads.append(threading.get_ident())
+        return logo_media_type(logo_hash)
+
+    monkeypatch.setattr(logo_service, "logo_media_type", recording_logo_media_type)
+    asyncio.run(find_logo(logo_store.put(PNG)))
+    assert lookup_threads and threading.get_ident() not in lookup_threads
@@ -0,0 +1,143 @@
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.api.endpoints.internal import require_profiling_token
+from app.api.utils.profiler import ProfileStore, SamplingProfiler
+from app.config import settings
+from app.middleware import ProfilingMiddleware, PROFILE_ID_HEADER
+
+
+def profile_id(second: int) -> str:
+    return f"20260517T1200{second:02d}.000000-0000abcd"
+
+
+def test_profile_store_keeps_newest_profiles(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=3)
+    for second in range(5):
+        store.save(profile_id(second), f"main {second}\n")
+
+    assert store.list() == [profile_id(4), profile_id(3), profile_id(2)]
+    assert store.path(profile_id(4)).read_text() == "main 4\n"
+    assert store.path(profile_id(1)) is None
+
+
+@pytest.mark.parametrize("invalid_id", ["../secret", "20260517T120000-0000abcd", profile_id(0) + ".collapsed", ""])
+def test_profile_store_rejects_invalid_ids(tmp_path, invalid_id):
+    store = ProfileStore(tmp_path, max_profiles=3)
+    store.save(profile_id(0), "main 1\n")
+    assert store.path(invalid_id) is None
+
+
+def busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def profiled_request(profilers):
+    profiler = SamplingProfiler(threading.get_ident(), 0.001, root_frame=sys._getframe())
+    profiler.start()
+    profilers.append(profiler)
+    try:
+        for _ in range(10):
+            profiled_work()
+            await asyncio.sleep(0)
+    finally:
+        profiler.stop()
+
+
+def profiled_work():
+    busy(0.02)
+
+
+async def concurrent_request():
+    for _ in range(10):
+        concurrent_work()
+        await asyncio.sleep(0)
+
+
+def concurrent_work():
+    busy(0.02)
+
+
+def test_profile_has_only_the_profiled_tasks_samples():
+    async def scenario():
+        profilers = []
+        await asyncio.gather(profiled_request(profilers), concurrent_request())
+        return profilers[0]
+
+    profiler = asyncio.run(scenario())
+    stacks = list(profiler.stacks)
+    assert stacks
+    assert all(stack.startswith("profiled_request (") for stack in stacks)
+    assert any("profiled_work" in stack for stack in stacks)
+    assert not any("concurrent_work" in stack for stack in stacks)
+
+
+def test_profiler_without_root_frame_samples_the_whole_thread():
+    profiler = SamplingProfiler(threading.get_ident(), 0.001)
+    profiler.start()
+    concurrent_work()
+    profiler.stop()
+    assert any("concurrent_work" in stack for stack in profiler.stacks)
+
+
+async def hello(request):
+    busy(0.01)
+    return PlainTextResponse("hello")
+
+
+def make_client(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=10)
+    app = Starlette(routes=[Route("/hello", hello), Route("/internal/profiles", hello)])
+    app = ProfilingMiddleware(app, token="secret", profile_store=store, interval=0.001,
+                              excluded_paths=("/internal/profiles",))
+    return TestClient(app), store
+
+
+def test_request_with_token_is_profiled(tmp_path):
+    client, store = make_client(tmp_path)
+    response = client.get("/hello", headers={"X-Profile": "secret"})
+    assert response.text == "hello"
+    assert store.list() == [response.headers[PROFILE_ID_HEADER]]
+
+
+@pytest.mark.parametrize("path, headers", [
+    ("/hello", {}),
+    ("/hello", {"X-Profile": "wrong"}),
+    ("/hello", {"X-Profile": ""}),
+    ("/internal/profiles", {"X-Profile": "secret"}),
+])
+def test_request_is_not_profiled(tmp_path, path, headers):
+    client, store = make_client(tmp_path)
+    response = client.get(path, headers=headers)
+    assert response.text == "hello"
+    assert PROFILE_ID_HEADER not in response.headers
+    assert store.list() == []
+
+
+@pytest.mark.parametrize("enabled, token, x_profile, status_code", [
+    (False, "secret", "secret", 404),
+    (True, None, "secret", 404),
+    (True, "secret", None, 403),
+    (True, "secret", "wrong", 403),
+    (True, "secret", "secret", None),
+])
+def test_reading_profiles_requires_the_token(monkeypatch, enabled, token, x_profile, status_code):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", enabled)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", token)
+    if status_code is None:
+        require_profiling_token(x_profile)
+        return
+    with pytest.raises(HTTPException) as error:
+        require_profiling_token(x_profile)
+    assert error.value.status_code == status_code
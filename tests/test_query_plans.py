@@ -0,0 +1,117 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+
+from app.api.models.models import Match, FootballTeamToTournament
+from app.api.repositories.tournament_queries import TOURNAMENT_STANDINGS_SQL
+from tests.postgresql import requires_postgresql, throwaway_schema, schema_url
+
+
+pytestmark = requires_postgresql
+
+
+TOURNAMENTS = 500
+TEAMS_PER_TOURNAMENT = 20
+TOURS = 2 * (TEAMS_PER_TOURNAMENT - 1)
+
+SEED_SQL = [
+    "INSERT INTO users (id, username, hashed_password, is_active) VALUES (1, 'plans', '', true)",
+    "INSERT INTO players (id, user_id) VALUES (1, 1)",
+    "INSERT INTO tournament_types (id, tournament_type_name) VALUES (1, 'league')",
+    f"""
+    INSERT INTO tournaments (id, player_id, tournament_type_id, tournament_name)
+    SELECT t, 1, 1, 'tournament ' || t FROM generate_series(1, {TOURNAMENTS}) AS t
+    """,
+    f"""
+    INSERT INTO football_teams (id, player_id, team_name)
+    SELECT f, 1, 'team ' || f FROM generate_series(1, {TOURNAMENTS * TEAMS_PER_TOURNAMENT}) AS f
+    """,
+    f"""
+    INSERT INTO football_teams_to_tournaments (tournament_id, football_team_id)
+    SELECT t, (t - 1) * {TEAMS_PER_TOURNAMENT} + k
+    FROM generate_series(1, {TOURNAMENTS}) AS t, generate_series(1, {TEAMS_PER_TOURNAMENT}) AS k
+    """,
+    # A double round robin per tournament with the first half of the tours played
+    f"""
+    INSERT INTO matches (tournament_id, tour_number, home_team_id, guest_team_id, home_team_score, guest_team_score)
+    SELECT
+        t, 1 + (h + g) % {TOURS},
+        (t - 1) * {TEAMS_PER_TOURNAMENT} + h, (t - 1) * {TEAMS_PER_TOURNAMENT} + g,
+        CASE WHEN (h + g) % {TOURS} < {TOURS // 2} THEN h % 4 END,
+        CASE WHEN (h + g) % {TOURS} < {TOURS // 2} THEN g % 3 END
+    FROM generate_series(1, {TOURNAMENTS}) AS t,
+        generate_series(1, {TEAMS_PER_TOURNAMENT}) AS h,
+        generate_series(1, {TEAMS_PER_TOURNAMENT}) AS g
+    WHERE h <> g
+    """,
+]
+
+
+@pytest.fixture(scope="module")
+def connection():
+    """
+    Connection to a throwaway schema with the application's tables, seeded and analyzed.
+    """
+    with throwaway_schema("query_plans", SEED_SQL) as schema:
+        url, connect_args = schema_url(schema, "postgresql+psycopg2")
+        engine = create_engine(url, connect_args=connect_args)
+        try:
+            with engine.connect() as setup:
+                setup.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+            with engine.connect() as connection:
+                yield connection
+        finally:
+            engine.dispose()
+
+
+def sequential_scans(connection, statement) -> list[str]:
+    """
+    Tables read by a Seq Scan in the plan of the statement.
+    """
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+
+    scans = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+TOURNAMENT_ID = TOURNAMENTS // 2
+
+
+def test_schedule_uses_index(connection):
+    statement = (
+        select(*Match.__table__.columns)
+        .where(Match.tournament_id == TOURNAMENT_ID)
+        .order_by(Match.tour_number, Match.id)
+    )
+    assert sequential_scans(connection, statement) == []
+
+
+def test_tour_schedule_uses_index(connection):
+    statement = (
+        select(*Match.__table__.columns)
+        .where(Match.tournament_id == TOURNAMENT_ID, Match.tour_number == 3)
+        .order_by(Match.tour_number, Match.id)
+    )
+    assert sequential_scans(connection, statement) == []
+
+
+def test_standings_aggregate_uses_indexes(connection):
+    statement = TOURNAMENT_STANDINGS_SQL.bindparams(tournament_id=TOURNAMENT_ID)
+    assert sequential_scans(connection, statement) == []
+
+
+def test_enrollment_lookup_uses_index(connection):
+    statement = (
+        select(FootballTeamToTournament.id)
+        .where(
+            FootballTeamToTournament.tournament_id == TOURNAMENT_ID,
+            FootballTeamToTournament.football_team_id == TOURNAMENT_ID * TEAMS_PER_TOURNAMENT
+        )
+    )
+    assert sequential_scans(connection, statement) == []
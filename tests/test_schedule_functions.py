@@ -0,0 +1,100 @@
+from collections import Counter
+from itertools import count
+from types import SimpleNamespace
+
+from app.api.utils.schedule_functions import generate_schedule, plan_reschedule, find_double_bookings
+
+
+def make_matches(schedule, played_tours=0):
+    match_ids = count(1)
+    return [
+        SimpleNamespace(
+            id=next(match_ids),
+            tour_number=tour_number,
+            home_team_id=home_team_id,
+            guest_team_id=guest_team_id,
+            home_team_score=1 if tour_number <= played_tours else None,
+            guest_team_score=0 if tour_number <= played_tours else None,
+        )
+        for tour_number, tour_matches in enumerate(schedule, start=1)
+        for home_team_id, guest_team_id in tour_matches
+    ]
+
+
+def apply_plan(matches, plan):
+    """
+    Returns the (tour_number, home_team_id, guest_team_id) fixtures after the planned changes.
+    """
+    _, moved, inserted, deleted_match_ids = plan
+    tour_numbers = {match.id: match.tour_number for match in matches}
+    tour_numbers.update(moved)
+    fixtures = [
+        (tour_numbers[match.id], match.home_team_id, match.guest_team_id)
+        for match in matches
+        if match.id not in deleted_match_ids
+    ]
+    return fixtures + inserted
+
+
+def meetings(fixtures):
+    return Counter(frozenset((home_team_id, guest_team_id)) for _, home_team_id, guest_team_id in fixtures)
+
+
+def test_generated_schedule_has_no_double_bookings():
+    for teams_count in range(2, 12):
+        schedule = generate_schedule(range(teams_count), legs=2)
+        fixtures = [
+            (tour_number, home_team_id, guest_team_id)
+            for tour_number, tour_matches in enumerate(schedule, start=1)
+            for home_team_id, guest_team_id in tour_matches
+        ]
+        assert find_double_bookings(fixtures) == []
+
+
+def test_late_team_is_scheduled_after_played_tours():
+    matches = make_matches(generate_schedule(range(1, 7), legs=2), played_tours=3)
+
+    plan = plan_reschedule(matches, generate_schedule(range(1, 8), legs=2))
+    kept, moved, inserted, deleted_match_ids = plan
+    fixtures = apply_plan(matches, plan)
+
+    assert find_double_bookings(fixtures) == []
+    assert (kept, moved, deleted_match_ids) == (len(matches), [], [])
+    assert len(inserted) == 12
+    assert all(tour_number > 3 for tour_number, _, _ in inserted)
+    assert set(meetings(fixtures).values()) == {2}
+    assert len(meetings(fixtures)) == 21
+
+
+def test_removed_team_loses_only_unplayed_matches():
+    matches = make_matches(generate_schedule(range(1, 7), legs=2), played_tours=3)
+
+    plan = plan_reschedule(matches, generate_schedule(range(1, 6), legs=2))
+    _, moved, inserted, deleted_match_ids = plan
+    fixtures = apply_plan(matches, plan)
+
+    deleted = [match for match in matches if match.id in deleted_match_ids]
+    assert deleted and all(6 in (match.home_team_id, match.guest_team_id) for match in deleted)
+    assert all(match.home_team_score is None for match in deleted)
+    assert (moved, inserted) == ([], [])
+    assert find_double_bookings(fixtures) == []
+
+
+def test_unplayed_match_clashing_with_played_one_is_moved():
+    matches = make_matches([[(1, 2), (3, 4)], [(1, 3), (2, 4)], [(1, 4), (2, 3)]], played_tours=1)
+    # A fixture left in a played tour by an earlier re-schedule
+    matches[2].tour_number = 1
+
+    plan = plan_reschedule(matches, generate_schedule([1, 2, 3, 4], legs=1))
+    _, moved, inserted, deleted_match_ids = plan
+
+    assert moved == [(matches[2].id, 2)]
+    assert (inserted, deleted_match_ids) == ([], [])
+    assert find_double_bookings(apply_plan(matches, plan)) == []
+
+
+def test_unchanged_schedule_needs_no_writes():
+    schedule = list(generate_schedule(range(1, 9), legs=2))
+    matches = make_matches(schedule, played_tours=5)
+
+    assert plan_reschedule(matches, schedule) == (len(matches), [], [], [])
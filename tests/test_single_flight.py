@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.api.utils.single_flight import SingleFlight
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+class Computation:
+    """
+    A computation that blocks until released and counts how often it ran.
+    """
+
+    def __init__(self, value=None, error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.released = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.released.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+async def start_callers(single_flight, key, compute, count):
+    callers = [asyncio.create_task(single_flight.do(key, compute)) for _ in range(count)]
+    # Let the leader and every follower reach their wait
+    await asyncio.sleep(0)
+    return callers
+
+
+def test_followers_share_the_leaders_result():
+    async def scenario():
+        single_flight = SingleFlight(max_wait_seconds=5)
+        compute = Computation(value=["standings"])
+        callers = await start_callers(single_flight, "key", compute, 10)
+        assert single_flight.in_flight() == 1
+        compute.released.set()
+        return single_flight, compute, await asyncio.gather(*callers)
+
+    single_flight, compute, results = run(scenario)
+    assert compute.calls == 1
+    assert results == [["standings"]] * 10
+    assert all(result is results[0] for result in results)
+    assert (single_flight.followers, single_flight.follower_timeouts) == (9, 0)
+
+
+def test_leader_exception_reaches_every_waiter():
+    async def scenario():
+        single_flight = SingleFlight(max_wait_seconds=5)
+        compute = Computation(error=RuntimeError("database is down"))
+        callers = await start_callers(single_flight, "key", compute, 5)
+        compute.released.set()
+        return compute, await asyncio.gather(*callers, return_exceptions=True)
+
+    compute, results = run(scenario)
+    assert compute.calls == 1
+    assert len(results) == 5
+    assert all(isinstance(result, RuntimeError) and str(result) == "database is down" for result in results)
+
+
+def test_follower_computes_by_itself_after_timeout():
+    async def scenario():
+        single_flight = SingleFlight(max_wait_seconds=0.05)
+        slow = Computation(value="leader")
+        leader = asyncio.create_task(single_flight.do("key", slow))
+        await asyncio.sleep(0)
+
+        async def fast():
+            return "follower"
+
+        follower_result = await single_flight.do("key", fast)
+        # The follower giving up leaves the leader's flight running
+        assert not leader.done()
+        slow.released.set()
+        return single_flight, follower_result, await leader
+
+    single_flight, follower_result, leader_result = run(scenario)
+    assert (follower_result, leader_result) == ("follower", "leader")
+    assert (single_flight.followers, single_flight.follower_timeouts) == (1, 1)
+
+
+def test_followers_compute_when_leader_is_cancelled():
+    async def scenario():
+        single_flight = SingleFlight(max_wait_seconds=5)
+        stuck = Computation()
+        leader = asyncio.create_task(single_flight.do("key", stuck))
+        await asyncio.sleep(0)
+
+        async def compute():
+            return "recomputed"
+
+        follower = asyncio.create_task(single_flight.do("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, leader
+
+    follower_result, leader = run(scenario)
+    assert follower_result == "recomputed"
+    assert leader.cancelled()
+
+
+@pytest.mark.parametrize("error", [None, ValueError("failed")])
+def test_key_is_released_after_the_flight(error):
+    async def scenario():
+        single_flight = SingleFlight(max_wait_seconds=5)
+        compute = Computation(value=1, error=error)
+        callers = await start_callers(single_flight, "key", compute, 3)
+        compute.released.set()
+        await asyncio.gather(*callers, return_exceptions=True)
+        assert single_flight.in_flight() == 0
+
+        # A later call is a new flight that computes again
+        later = Computation(value=2)
+        later.released.set()
+        return compute, await single_flight.do("key", later), later
+
+    compute, result, later = run(scenario)
+    assert (compute.calls, later.calls, result) == (1, 1, 2)
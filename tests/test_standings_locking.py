@@ -0,0 +1,167 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.api.endpoints.items.items_put import update_match_info
+from app.api.models.models import TournamentStanding
+from app.api.repositories.tournament_queries import TOURNAMENT_STANDINGS_SQL
+from app.api.schemas.item import MatchUpdate, MatchResultUpdate
+from app.api.services.match_service import update_match_results
+from app.api.services.standings_service import rebuild_tournament_standings
+from tests.postgresql import requires_postgresql, throwaway_schema, schema_url
+
+
+pytestmark = requires_postgresql
+
+
+TOURNAMENT_ID = 1
+# Teams 1-4 play a single round robin, the first two tours are played
+SEED_SQL = [
+    "INSERT INTO users (id, username, hashed_password, is_active) VALUES (1, 'locking', '', true)",
+    "INSERT INTO players (id, user_id) VALUES (1, 1)",
+    "INSERT INTO tournament_types (id, tournament_type_name) VALUES (1, 'league')",
+    "INSERT INTO tournaments (id, player_id, tournament_type_id, tournament_name) VALUES (1, 1, 1, 'locking')",
+    "INSERT INTO football_teams (id, player_id, team_name) SELECT f, 1, 'team ' || f FROM generate_series(1, 4) AS f",
+    "INSERT INTO football_teams_to_tournaments (tournament_id, football_team_id) SELECT 1, f FROM generate_series(1, 4) AS f",
+    """
+    INSERT INTO matches (id, tournament_id, tour_number, home_team_id, guest_team_id, home_team_score, guest_team_score, date)
+    SELECT *, now() FROM (VALUES
+        (1, 1, 1, 1, 2, 2, 0), (2, 1, 1, 3, 4, 1, 1), (3, 1, 2, 1, 3, 0, 1),
+        (4, 1, 2, 2, 4, 3, 2), (5, 1, 3, 1, 4, NULL, NULL), (6, 1, 3, 2, 3, NULL, NULL)
+    ) AS seed
+    """,
+]
+
+# How long a blocked writer is given to show that it waits for the lock
+BLOCKED_SECONDS = 0.5
+
+
+def run_concurrently(scenario):
+    async def run():
+        with throwaway_schema("standings_locking", SEED_SQL) as schema:
+            url, connect_args = schema_url(schema, "postgresql+asyncpg")
+            engine = create_async_engine(url, connect_args=connect_args)
+            try:
+                async with AsyncSession(engine) as setup:
+                    await rebuild_tournament_standings(setup, TOURNAMENT_ID)
+                    await setup.commit()
+                await scenario(lambda: AsyncSession(engine, autoflush=False, expire_on_commit=False))
+                async with AsyncSession(engine) as check:
+                    return await read_standings(check), await aggregate_standings(check)
+            finally:
+                await engine.dispose()
+
+    return asyncio.run(run())
+
+
+async def read_standings(db: AsyncSession) -> dict:
+    rows = (await db.execute(
+        select(TournamentStanding).where(TournamentStanding.tournament_id == TOURNAMENT_ID)
+    )).scalars()
+    return {
+        row.football_team_id: (row.matches_played, row.score, row.wins, row.draws, row.losses,
+                               row.goals_scored, row.goals_conceded)
+        for row in rows
+    }
+
+
+async def aggregate_standings(db: AsyncSession) -> dict:
+    rows = (await db.execute(TOURNAMENT_STANDINGS_SQL, {"tournament_id": TOURNAMENT_ID})).mappings()
+    return {
+        row["team_id"]: (row["matches_played"], row["score"], row["wins"], row["draws"], row["losses"],
+                         row["goals_scored"], row["goals_conceded"])
+        for row in rows
+    }
+
+
+def test_match_update_waits_for_overlapping_rebuild():
+    async def scenario(session):
+        async with session() as rebuilding, session() as updating:
+            await rebuild_tournament_standings(rebuilding, TOURNAMENT_ID)
+            update = asyncio.create_task(
+                update_match_info(5, MatchUpdate(home_team_score=4, guest_team_score=1), updating, None)
+            )
+            await asyncio.sleep(BLOCKED_SECONDS)
+            assert not update.done()
+            await rebuilding.commit()
+            await update
+
+    standings, expected = run_concurrently(scenario)
+    assert standings == expected
+    assert standings[1][0] == 3
+
+
+def test_rebuild_waits_for_overlapping_match_update():
+    async def scenario(session):
+        async with session() as updating, session() as rebuilding:
+            # The update only flushes, its transaction is committed once the rebuild is waiting
+            commit = updating.commit
+            updating.commit = updating.flush
+            await update_match_info(6, MatchUpdate(home_team_score=0, guest_team_score=2), updating, None)
+            rebuild = asyncio.create_task(rebuild_tournament_standings(rebuilding, TOURNAMENT_ID))
+            await asyncio.sleep(BLOCKED_SECONDS)
+            assert not rebuild.done()
+            await commit()
+            await rebuild
+            await rebuilding.commit()
+
+    standings, expected = run_concurrently(scenario)
+    assert standings == expected
+    assert standings[3][0] == 3
+
+
+def test_overlapping_rebuilds_do_not_conflict():
+    async def scenario(session):
+        async with session() as first, session() as second:
+            await rebuild_tournament_standings(first, TOURNAMENT_ID)
+            rebuild = asyncio.create_task(rebuild_tournament_standings(second, TOURNAMENT_ID))
+            await asyncio.sleep(BLOCKED_SECONDS)
+            assert not rebuild.done()
+            await first.commit()
+            await rebuild
+            await second.commit()
+
+    standings, expected = run_concurrently(scenario)
+    assert standings == expected
+
+
+def test_overlapping_bulk_results_apply_both_deltas():
+    async def scenario(session):
+        async with session() as first_referee, session() as second_referee:
+            await update_match_results(first_referee, TOURNAMENT_ID, [
+                MatchResultUpdate(match_id=5, home_team_score=1, guest_team_score=0),
+                MatchResultUpdate(match_id=6, home_team_score=2, guest_team_score=2),
+            ])
+            # Corrects a played match and a match the first referee is still writing
+            second = asyncio.create_task(update_match_results(second_referee, TOURNAMENT_ID, [
+                MatchResultUpdate(match_id=1, home_team_score=0, guest_team_score=0),
+                MatchResultUpdate(match_id=6, home_team_score=0, guest_team_score=3),
+            ]))
+            await asyncio.sleep(BLOCKED_SECONDS)
+            assert not second.done()
+            await first_referee.commit()
+            await second
+            await second_referee.commit()
+
+    standings, expected = run_concurrently(scenario)
+    assert standings == expected
+    assert [standings[team_id][0] for team_id in range(1, 5)] == [3, 3, 3, 3]
+
+
+def test_bulk_results_wait_for_overlapping_rebuild():
+    async def scenario(session):
+        async with session() as rebuilding, session() as referee:
+            await rebuild_tournament_standings(rebuilding, TOURNAMENT_ID)
+            results = asyncio.create_task(update_match_results(referee, TOURNAMENT_ID, [
+                MatchResultUpdate(match_id=5, home_team_score=3, guest_team_score=3),
+            ]))
+            await asyncio.sleep(BLOCKED_SECONDS)
+            assert not results.done()
+            await rebuilding.commit()
+            await results
+            await referee.commit()
+
+    standings, expected = run_concurrently(scenario)
+    assert standings == expected
+    assert standings[4][0] == 3
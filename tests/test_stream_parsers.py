@@ -0,0 +1,53 @@
+import asyncio
+
+from app.api.utils.stream_parsers import iter_csv_records, iter_ndjson_records
+
+
+def parse(parse_records, body: bytes, chunk_size: int, max_line_length: int):
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    async def collect():
+        return [record async for record in parse_records(chunks(), max_line_length)]
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_skips_overlong_line_and_goes_on():
+    body = b'{"a": 1}\n{"a": "' + b"x" * 100 + b'"}\n{"a": 3}\n{"a": 4}'
+    for chunk_size in (1, 7, 64, len(body)):
+        records = parse(iter_ndjson_records, body, chunk_size, max_line_length=50)
+        assert records == [
+            (1, {"a": 1}, None),
+            (2, None, "Line is longer than 50 characters"),
+            (3, {"a": 3}, None),
+            (4, {"a": 4}, None),
+        ]
+
+
+def test_ndjson_overlong_last_line_is_reported():
+    records = parse(iter_ndjson_records, b'{"a": 1}\n' + b"y" * 100, 16, max_line_length=50)
+    assert records == [(1, {"a": 1}, None), (2, None, "Line is longer than 50 characters")]
+
+
+def test_csv_skips_overlong_row_and_goes_on():
+    body = b'name,note\nfirst,short\nsecond,"' + b"z" * 60 + b'\n' + b"z" * 60 + b'"\nthird,"multi\nline"\nfourth,x\n'
+    for chunk_size in (1, 5, 32, len(body)):
+        records = parse(iter_csv_records, body, chunk_size, max_line_length=50)
+        assert records == [
+            (2, {"name": "first", "note": "short"}, None),
+            (3, None, "Row is longer than 50 characters"),
+            (5, {"name": "third", "note": "multi\nline"}, None),
+            (7, {"name": "fourth", "note": "x"}, None),
+        ]
+
+
+def test_csv_overlong_line_with_quotes_keeps_row_boundaries():
+    # The overlong line opens a quoted field that is closed on the next line
+    body = b'name,note\nfirst,"' + b"q" * 80 + b'\nend"\nsecond,ok\n'
+    records = parse(iter_csv_records, body, 8, max_line_length=50)
+    assert records == [
+        (2, None, "Row is longer than 50 characters"),
+        (4, {"name": "second", "note": "ok"}, None),
+    ]